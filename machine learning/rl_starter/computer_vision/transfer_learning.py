@@ -15,6 +15,7 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
 import matplotlib
@@ -28,6 +29,11 @@ from torch.utils.data import DataLoader
 from torchvision import datasets, models, transforms
 from tqdm import tqdm
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.metrics import RunningMetrics
+
 OUTPUT_DIR = Path("outputs")
 
 # ── model factory ───────────────────────────────────────────────
@@ -203,7 +209,7 @@ def get_device(requested: str) -> torch.device:
 
 def train_epoch(model, loader, optimizer, scaler, device):
     model.train()
-    total_loss, correct, total = 0.0, 0, 0
+    metrics = RunningMetrics(device)
     for images, labels in loader:
         images, labels = images.to(device), labels.to(device)
         optimizer.zero_grad()
@@ -213,22 +219,20 @@ def train_epoch(model, loader, optimizer, scaler, device):
         scaler.scale(loss).backward()
         scaler.step(optimizer)
         scaler.update()
-        total_loss += loss.item() * images.size(0)
-        correct += (out.argmax(1) == labels).sum().item()
-        total += images.size(0)
-    return total_loss / total, correct / total
+        metrics.update(images.size(0), loss=loss * images.size(0), correct=(out.argmax(1) == labels).sum())
+    avg = metrics.compute()
+    return avg["loss"], avg["correct"]
 
 
 @torch.no_grad()
 def evaluate(model, loader, device):
     model.eval()
-    correct, total = 0, 0
+    metrics = RunningMetrics(device)
     for images, labels in loader:
         images, labels = images.to(device), labels.to(device)
         out = model(images)
-        correct += (out.argmax(1) == labels).sum().item()
-        total += images.size(0)
-    return correct / total
+        metrics.update(images.size(0), correct=(out.argmax(1) == labels).sum())
+    return metrics.compute()["correct"]
 
 
 def main() -> None:
@@ -282,7 +286,7 @@ def main() -> None:
 
     for epoch in tqdm(range(args.unfreeze_epoch + 1, args.epochs + 1), desc="Fine-tune"):
         model.train()
-        total_loss, correct, total = 0.0, 0, 0
+        metrics = RunningMetrics(device)
         for images, labels in train_loader:
             images, labels = images.to(device), labels.to(device)
             optimizer.zero_grad()
@@ -293,10 +297,9 @@ def main() -> None:
             scaler.step(optimizer)
             scaler.update()
             scheduler.step()
-            total_loss += loss.item() * images.size(0)
-            correct += (out.argmax(1) == labels).sum().item()
-            total += images.size(0)
-        ta = correct / total
+            metrics.update(images.size(0), loss=loss * images.size(0), correct=(out.argmax(1) == labels).sum())
+        avg = metrics.compute()
+        ta = avg["correct"]
         test_acc = evaluate(model, test_loader, device)
         history["train_acc"].append(ta)
         history["test_acc"].append(test_acc)
@@ -305,7 +308,7 @@ def main() -> None:
             OUTPUT_DIR.mkdir(exist_ok=True)
             torch.save(model.state_dict(), OUTPUT_DIR / f"{tag}_best.pt")
         if epoch % 5 == 0 or epoch == args.unfreeze_epoch + 1:
-            print(f"  Epoch {epoch}  loss={total_loss / total:.4f}  train={ta:.4f}  test={test_acc:.4f}  best={best_acc:.4f}")
+            print(f"  Epoch {epoch}  loss={avg['loss']:.4f}  train={ta:.4f}  test={test_acc:.4f}  best={best_acc:.4f}")
 
     # plots
     OUTPUT_DIR.mkdir(exist_ok=True)
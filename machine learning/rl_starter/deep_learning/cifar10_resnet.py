@@ -3,18 +3,26 @@ cifar10_resnet.py — Custom ResNet for CIFAR-10 with mixed precision.
 
 Features:
   - ResNet-style residual blocks built from scratch
-  - Data augmentation (RandomCrop, HorizontalFlip, ColorJitter)
+  - Data augmentation (RandomCrop, HorizontalFlip, ColorJitter), per image or batched on tensors
   - Cosine annealing LR schedule
   - Mixed precision training (AMP) for faster GPU training
+  - CPU fast path: bf16 autocast, channels_last and optional torch.compile
+  - Optional full-state checkpoints written in the background; --resume continues a killed run
   - Targets 92%+ accuracy
 
 Usage:
     python cifar10_resnet.py --epochs 50 --device auto
+    python cifar10_resnet.py --epochs 50 --device cpu --bf16 --channels-last --compile
+    python cifar10_resnet.py --benchmark --device cpu     # images/sec of each CPU mode
+    python cifar10_resnet.py --epochs 50 --tensor-augment --seed 0
+    python cifar10_resnet.py --epochs 50 --resume           # continue from the latest checkpoint
 """
 
 from __future__ import annotations
 
 import argparse
+import sys
+import time
 from pathlib import Path
 
 import matplotlib
@@ -27,8 +35,17 @@ from torch.utils.data import DataLoader
 from torchvision import datasets, transforms
 from tqdm import tqdm
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.checkpoint import CheckpointWriter, latest_checkpoint, load_checkpoint, training_state
+from ml_utils.metrics import RunningMetrics
+from ml_utils.tensor_data import BatchAugment, PreloadedImages
+
 OUTPUT_DIR = Path("outputs")
+CHECKPOINT_DIR = OUTPUT_DIR / "cifar10_checkpoints"
 CLASSES = ("plane", "car", "bird", "cat", "deer", "dog", "frog", "horse", "ship", "truck")
+MEAN, STD = (0.4914, 0.4822, 0.4465), (0.2470, 0.2435, 0.2616)
 
 
 class ResidualBlock(nn.Module):
@@ -90,55 +107,127 @@ def get_device(requested: str) -> torch.device:
     return torch.device(requested)
 
 
-def get_dataloaders(batch_size: int):
+def autocast(device: torch.device, bf16: bool = False, train: bool = True):
+    """bf16 autocast on CUDA or CPU when requested; otherwise fp16 for CUDA training steps
+    (as before) and plain fp32 everywhere else, including evaluation."""
+    if device.type == "cuda" and train and not bf16:
+        return torch.autocast("cuda", dtype=torch.float16)
+    return torch.autocast(device.type, dtype=torch.bfloat16, enabled=bf16)
+
+
+def precision_name(device: torch.device, bf16: bool = False) -> str:
+    """Training-step dtype that ``autocast`` picks, for labelling benchmark rows."""
+    if bf16:
+        return "bf16 autocast"
+    return "fp16 autocast" if device.type == "cuda" else "fp32"
+
+
+def to_device(images: torch.Tensor, device: torch.device, channels_last: bool = False) -> torch.Tensor:
+    fmt = torch.channels_last if channels_last else torch.contiguous_format
+    return images.to(device, memory_format=fmt, non_blocking=True)
+
+
+def get_dataloaders(batch_size: int, tensor_augment: bool = False, device=None, seed: int | None = None):
+    """PIL transforms in 2 DataLoader workers, or (``tensor_augment``) preloaded uint8
+    tensors augmented a whole batch at a time with the same crop / flip / jitter."""
     train_tf = transforms.Compose([
         transforms.RandomCrop(32, padding=4),
         transforms.RandomHorizontalFlip(),
         transforms.ColorJitter(brightness=0.1, contrast=0.1),
         transforms.ToTensor(),
-        transforms.Normalize((0.4914, 0.4822, 0.4465), (0.2470, 0.2435, 0.2616)),
+        transforms.Normalize(MEAN, STD),
     ])
     test_tf = transforms.Compose([
         transforms.ToTensor(),
-        transforms.Normalize((0.4914, 0.4822, 0.4465), (0.2470, 0.2435, 0.2616)),
+        transforms.Normalize(MEAN, STD),
     ])
     train_ds = datasets.CIFAR10("data", train=True, download=True, transform=train_tf)
     test_ds = datasets.CIFAR10("data", train=False, download=True, transform=test_tf)
+    if tensor_augment:
+        augment = BatchAugment(padding=4, flip=True, brightness=0.1, contrast=0.1, seed=seed)
+        train_loader = PreloadedImages.from_dataset(
+            train_ds, batch_size, shuffle=True, mean=MEAN, std=STD, device=device, augment=augment
+        )
+        test_loader = PreloadedImages.from_dataset(test_ds, batch_size, mean=MEAN, std=STD, device=device)
+        return train_loader, test_loader
     train_loader = DataLoader(train_ds, batch_size=batch_size, shuffle=True, num_workers=2, pin_memory=True)
     test_loader = DataLoader(test_ds, batch_size=batch_size, shuffle=False, num_workers=2, pin_memory=True)
     return train_loader, test_loader
 
 
-def train_epoch(model, loader, optimizer, scheduler, scaler, device):
+def train_epoch(model, loader, optimizer, scheduler, scaler, device, bf16=False, channels_last=False):
     model.train()
-    total_loss, correct, total = 0.0, 0, 0
+    metrics = RunningMetrics(device)
     for images, labels in loader:
-        images, labels = images.to(device), labels.to(device)
+        images, labels = to_device(images, device, channels_last), labels.to(device)
         optimizer.zero_grad()
-        with torch.autocast(device_type=device.type, enabled=device.type == "cuda"):
+        with autocast(device, bf16):
             out = model(images)
             loss = F.cross_entropy(out, labels)
         scaler.scale(loss).backward()
         scaler.step(optimizer)
         scaler.update()
         scheduler.step()
-        total_loss += loss.item() * images.size(0)
-        correct += (out.argmax(1) == labels).sum().item()
-        total += images.size(0)
-    return total_loss / total, correct / total
+        metrics.update(images.size(0), loss=loss * images.size(0), correct=(out.argmax(1) == labels).sum())
+    avg = metrics.compute()
+    return avg["loss"], avg["correct"]
 
 
 @torch.no_grad()
-def evaluate(model, loader, device):
+def evaluate(model, loader, device, bf16=False, channels_last=False):
     model.eval()
-    total_loss, correct, total = 0.0, 0, 0
+    metrics = RunningMetrics(device)
     for images, labels in loader:
-        images, labels = images.to(device), labels.to(device)
-        out = model(images)
-        total_loss += F.cross_entropy(out, labels).item() * images.size(0)
-        correct += (out.argmax(1) == labels).sum().item()
-        total += images.size(0)
-    return total_loss / total, correct / total
+        images, labels = to_device(images, device, channels_last), labels.to(device)
+        with autocast(device, bf16, train=False):
+            out = model(images)
+        loss = F.cross_entropy(out.float(), labels, reduction="sum")
+        metrics.update(images.size(0), loss=loss, correct=(out.argmax(1) == labels).sum())
+    avg = metrics.compute()
+    return avg["loss"], avg["correct"]
+
+
+def build_model(device: torch.device, channels_last: bool = False, use_compile: bool = False) -> nn.Module:
+    model = CIFARResNet().to(device)
+    if channels_last:
+        model = model.to(memory_format=torch.channels_last)
+    if use_compile:
+        model = torch.compile(model)
+    return model
+
+
+def benchmark(device: torch.device, batch_size: int, steps: int = 20, warmup: int = 5) -> None:
+    """Training-step images/sec of the current NCHW path (fp16 autocast on CUDA, fp32 on CPU)
+    against each fast-path option."""
+    configs = [(False, False, False), (True, False, False), (True, True, False), (True, True, True)]
+    images = torch.randn(batch_size, 3, 32, 32)
+    labels = torch.randint(0, 10, (batch_size,), device=device)
+    sync = torch.cuda.synchronize if device.type == "cuda" else (lambda: None)
+    print(f"Training-step throughput on {device} (batch {batch_size}, {steps} timed steps)")
+    baseline = None
+    for bf16, channels_last, use_compile in configs:
+        name = precision_name(device, bf16)
+        name += " + channels_last" if channels_last else " NCHW"
+        name += " + compile" if use_compile else ""
+        name += "" if bf16 else " (current)"
+        torch.manual_seed(0)
+        model = build_model(device, channels_last, use_compile)
+        model.train()
+        optimizer = torch.optim.SGD(model.parameters(), lr=0.1, momentum=0.9)
+        x = to_device(images, device, channels_last)
+        for step in range(warmup + steps):
+            if step == warmup:
+                sync()
+                start = time.perf_counter()
+            optimizer.zero_grad(set_to_none=True)
+            with autocast(device, bf16):
+                loss = F.cross_entropy(model(x), labels)
+            loss.backward()
+            optimizer.step()
+        sync()
+        rate = steps * batch_size / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"  {name:<32s} {rate:8.0f} img/s  {rate / baseline:5.2f}×")
 
 
 def save_curves(history: dict) -> None:
@@ -158,14 +247,15 @@ def save_curves(history: dict) -> None:
 
 
 @torch.no_grad()
-def save_predictions(model, loader, device) -> None:
+def save_predictions(model, loader, device, bf16=False, channels_last=False) -> None:
     OUTPUT_DIR.mkdir(exist_ok=True)
     model.eval()
     images, labels = next(iter(loader))
-    images, labels = images[:16].to(device), labels[:16].to(device)
-    preds = model(images).argmax(1)
-    mean = torch.tensor([0.4914, 0.4822, 0.4465]).view(3, 1, 1)
-    std = torch.tensor([0.2470, 0.2435, 0.2616]).view(3, 1, 1)
+    images, labels = to_device(images[:16], device, channels_last), labels[:16].to(device)
+    with autocast(device, bf16, train=False):
+        preds = model(images).argmax(1)
+    mean = torch.tensor(MEAN).view(3, 1, 1)
+    std = torch.tensor(STD).view(3, 1, 1)
     fig, axes = plt.subplots(2, 8, figsize=(16, 4))
     for i, ax in enumerate(axes.flat):
         img = images[i].cpu() * std + mean
@@ -186,39 +276,92 @@ def main() -> None:
     parser.add_argument("--lr", type=float, default=0.1)
     parser.add_argument("--weight-decay", type=float, default=5e-4)
     parser.add_argument("--device", choices=["auto", "cpu", "cuda"], default="auto")
+    parser.add_argument("--bf16", action="store_true", help="bf16 autocast (CPU or CUDA) instead of fp32 / fp16")
+    parser.add_argument("--channels-last", action="store_true", help="NHWC memory format for model and inputs")
+    parser.add_argument("--compile", action="store_true", help="torch.compile the model")
+    parser.add_argument("--tensor-augment", action="store_true",
+                        help="Preload CIFAR as uint8 tensors and augment whole batches (no DataLoader workers)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for weights, shuffling and augmentation")
+    parser.add_argument("--checkpoint-dir", type=Path, default=None,
+                        help="Save a full-state checkpoint here every epoch (off by default; "
+                             "--resume alone uses outputs/cifar10_checkpoints)")
+    parser.add_argument("--keep-last", type=int, default=3, help="Epoch checkpoints to keep (0 keeps all)")
+    parser.add_argument("--resume", action="store_true", help="Continue from the latest checkpoint in --checkpoint-dir")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Report training images/sec of each fast-path option and exit")
+    parser.add_argument("--bench-steps", type=int, default=20)
     args = parser.parse_args()
 
     device = get_device(args.device)
     print(f"Device: {device}")
-
-    train_loader, test_loader = get_dataloaders(args.batch_size)
-    model = CIFARResNet().to(device)
+    if args.benchmark:
+        benchmark(device, args.batch_size, args.bench_steps)
+        return
+    if args.resume and args.checkpoint_dir is None:
+        args.checkpoint_dir = CHECKPOINT_DIR
+    if not args.resume and args.checkpoint_dir is not None and latest_checkpoint(args.checkpoint_dir) is not None:
+        parser.error(f"{args.checkpoint_dir} already holds checkpoints of an earlier run; "
+                     "pass --resume to continue it or a new --checkpoint-dir")
+
+    if args.seed is not None:
+        torch.manual_seed(args.seed)
+    train_loader, test_loader = get_dataloaders(args.batch_size, args.tensor_augment, device, args.seed)
+    model = build_model(device, args.channels_last, args.compile)
     total_params = sum(p.numel() for p in model.parameters())
     print(f"CIFARResNet: {total_params:,} parameters")
+    perf = {"bf16": args.bf16, "channels_last": args.channels_last}
 
     optimizer = torch.optim.SGD(model.parameters(), lr=args.lr, momentum=0.9, weight_decay=args.weight_decay)
     scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=args.epochs * len(train_loader))
-    scaler = torch.GradScaler()
+    # loss scaling is only needed for fp16; bf16 has fp32's exponent range
+    scaler = torch.GradScaler(device.type, enabled=device.type == "cuda" and not args.bf16)
 
     history = {"train_loss": [], "val_loss": [], "train_acc": [], "val_acc": []}
     best_acc = 0.0
-
-    for epoch in tqdm(range(1, args.epochs + 1), desc="Training"):
-        tl, ta = train_epoch(model, train_loader, optimizer, scheduler, scaler, device)
-        vl, va = evaluate(model, test_loader, device)
-        history["train_loss"].append(tl)
-        history["val_loss"].append(vl)
-        history["train_acc"].append(ta)
-        history["val_acc"].append(va)
-        if va > best_acc:
-            best_acc = va
-            OUTPUT_DIR.mkdir(exist_ok=True)
-            torch.save(model.state_dict(), OUTPUT_DIR / "cifar10_resnet_best.pt")
-        if epoch % 5 == 0 or epoch == 1:
-            print(f"  Epoch {epoch:3d}  loss={tl:.4f}  acc={ta:.4f}  val_acc={va:.4f}  best={best_acc:.4f}")
+    start_epoch = 1
+    # the tensor-augment path draws from its own generator, outside the global RNG state
+    augment = getattr(train_loader, "augment", None)
+
+    checkpoint = latest_checkpoint(args.checkpoint_dir) if args.resume else None
+    if checkpoint is not None:
+        state = load_checkpoint(checkpoint, model, optimizer, scheduler, scaler, map_location=device)
+        if state["extra"].get("epochs", args.epochs) != args.epochs:
+            parser.error(f"{checkpoint} was saved by a {state['extra']['epochs']}-epoch run; resuming with "
+                         f"--epochs {args.epochs} would change its LR schedule")
+        start_epoch = state["epoch"] + 1
+        history = state["history"]
+        best_acc = state["extra"]["best_acc"]
+        if augment is not None and state["extra"].get("augment_rng") is not None:
+            augment.generator.set_state(state["extra"]["augment_rng"])
+        print(f"Resumed from {checkpoint} at epoch {start_epoch}")
+    elif args.resume:
+        print(f"No checkpoint in {args.checkpoint_dir}; starting from epoch 1")
+
+    epochs = tqdm(range(start_epoch, args.epochs + 1), desc="Training", initial=start_epoch - 1, total=args.epochs)
+    # the writer also saves the best model; closing it (also on an exception or Ctrl-C) flushes the queue
+    with CheckpointWriter(args.checkpoint_dir or OUTPUT_DIR, keep_last=args.keep_last) as writer:
+        for epoch in epochs:
+            tl, ta = train_epoch(model, train_loader, optimizer, scheduler, scaler, device, **perf)
+            vl, va = evaluate(model, test_loader, device, **perf)
+            history["train_loss"].append(tl)
+            history["val_loss"].append(vl)
+            history["train_acc"].append(ta)
+            history["val_acc"].append(va)
+            if va > best_acc:
+                best_acc = va
+                # unwrap torch.compile so the checkpoint keys match a plain CIFARResNet
+                writer.save_as(getattr(model, "_orig_mod", model).state_dict(), OUTPUT_DIR / "cifar10_resnet_best.pt")
+            # snapshotted after evaluation, so the saved RNG state is exactly where the next epoch starts
+            if args.checkpoint_dir is not None:
+                writer.save(training_state(
+                    model, optimizer, epoch, scheduler, scaler, history, epochs=args.epochs, best_acc=best_acc,
+                    augment_rng=augment.generator.get_state() if augment is not None else None,
+                ), epoch)
+            if epoch % 5 == 0 or epoch == 1:
+                print(f"  Epoch {epoch:3d}  loss={tl:.4f}  acc={ta:.4f}  val_acc={va:.4f}  best={best_acc:.4f}")
 
     save_curves(history)
-    save_predictions(model, test_loader, device)
+    save_predictions(model, test_loader, device, **perf)
     print(f"\nBest test accuracy: {best_acc:.4f}")
     print("Done ✓")
 
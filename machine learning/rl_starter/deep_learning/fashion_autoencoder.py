@@ -6,14 +6,18 @@ Features:
   - Reconstruction visualization
   - t-SNE of latent space coloured by class
   - Anomaly detection via reconstruction error
+  - Optional per-epoch full-state checkpoints; --resume continues an interrupted run
 
 Usage:
     python fashion_autoencoder.py --epochs 20 --device auto
+    python fashion_autoencoder.py --epochs 20 --device auto --preload
+    python fashion_autoencoder.py --epochs 20 --resume
 """
 
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
 import matplotlib
@@ -27,7 +31,15 @@ from torch.utils.data import DataLoader
 from torchvision import datasets, transforms
 from tqdm import tqdm
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.checkpoint import CheckpointWriter, latest_checkpoint, load_checkpoint, training_state
+from ml_utils.metrics import RunningMetrics
+from ml_utils.tensor_data import PreloadedImages
+
 OUTPUT_DIR = Path("outputs")
+CHECKPOINT_DIR = OUTPUT_DIR / "fashion_checkpoints"
 CLASSES = [
     "T-shirt", "Trouser", "Pullover", "Dress", "Coat",
     "Sandal", "Shirt", "Sneaker", "Bag", "Boot",
@@ -89,7 +101,7 @@ def get_device(requested: str) -> torch.device:
 
 def train_epoch(model, loader, optimizer, device):
     model.train()
-    total_loss = 0.0
+    metrics = RunningMetrics(device)
     for images, _ in loader:
         images = images.to(device)
         recon, _ = model(images)
@@ -97,8 +109,8 @@ def train_epoch(model, loader, optimizer, device):
         optimizer.zero_grad()
         loss.backward()
         optimizer.step()
-        total_loss += loss.item() * images.size(0)
-    return total_loss / len(loader.dataset)
+        metrics.update(images.size(0), loss=loss * images.size(0))
+    return metrics.compute()["loss"]
 
 
 @torch.no_grad()
@@ -163,7 +175,19 @@ def main() -> None:
     parser.add_argument("--latent-dim", type=int, default=32)
     parser.add_argument("--lr", type=float, default=1e-3)
     parser.add_argument("--device", choices=["auto", "cpu", "cuda"], default="auto")
+    parser.add_argument("--preload", action="store_true",
+                        help="Decode each split once into a uint8 tensor on the device; no DataLoader workers")
+    parser.add_argument("--checkpoint-dir", type=Path, default=None,
+                        help="Save a full-state checkpoint here every epoch (off by default; "
+                             "--resume alone uses outputs/fashion_checkpoints)")
+    parser.add_argument("--keep-last", type=int, default=3, help="Epoch checkpoints to keep (0 keeps all)")
+    parser.add_argument("--resume", action="store_true", help="Continue from the latest checkpoint in --checkpoint-dir")
     args = parser.parse_args()
+    if args.resume and args.checkpoint_dir is None:
+        args.checkpoint_dir = CHECKPOINT_DIR
+    if not args.resume and args.checkpoint_dir is not None and latest_checkpoint(args.checkpoint_dir) is not None:
+        parser.error(f"{args.checkpoint_dir} already holds checkpoints of an earlier run; "
+                     "pass --resume to continue it or a new --checkpoint-dir")
 
     device = get_device(args.device)
     print(f"Device: {device}")
@@ -171,8 +195,12 @@ def main() -> None:
     transform = transforms.Compose([transforms.ToTensor()])
     train_ds = datasets.FashionMNIST("data", train=True, download=True, transform=transform)
     test_ds = datasets.FashionMNIST("data", train=False, download=True, transform=transform)
-    train_loader = DataLoader(train_ds, batch_size=args.batch_size, shuffle=True, num_workers=2, pin_memory=True)
-    test_loader = DataLoader(test_ds, batch_size=args.batch_size, shuffle=False, num_workers=2, pin_memory=True)
+    if args.preload:
+        train_loader = PreloadedImages.from_dataset(train_ds, args.batch_size, shuffle=True, device=device)
+        test_loader = PreloadedImages.from_dataset(test_ds, args.batch_size, device=device)
+    else:
+        train_loader = DataLoader(train_ds, batch_size=args.batch_size, shuffle=True, num_workers=2, pin_memory=True)
+        test_loader = DataLoader(test_ds, batch_size=args.batch_size, shuffle=False, num_workers=2, pin_memory=True)
 
     model = ConvAutoencoder(args.latent_dim).to(device)
     optimizer = torch.optim.Adam(model.parameters(), lr=args.lr)
@@ -180,10 +208,23 @@ def main() -> None:
     total_params = sum(p.numel() for p in model.parameters())
     print(f"ConvAutoencoder: {total_params:,} parameters (latent_dim={args.latent_dim})\n")
 
-    for epoch in tqdm(range(1, args.epochs + 1), desc="Training"):
-        loss = train_epoch(model, train_loader, optimizer, device)
-        if epoch % 5 == 0 or epoch == 1:
-            print(f"  Epoch {epoch:3d}  recon_loss={loss:.6f}")
+    start_epoch = 1
+    checkpoint = latest_checkpoint(args.checkpoint_dir) if args.resume else None
+    if checkpoint is not None:
+        state = load_checkpoint(checkpoint, model, optimizer, map_location=device)
+        start_epoch = state["epoch"] + 1
+        print(f"Resumed from {checkpoint} at epoch {start_epoch}")
+    elif args.resume:
+        print(f"No checkpoint in {args.checkpoint_dir}; starting from epoch 1")
+
+    epochs = tqdm(range(start_epoch, args.epochs + 1), desc="Training", initial=start_epoch - 1, total=args.epochs)
+    with CheckpointWriter(args.checkpoint_dir or OUTPUT_DIR, keep_last=args.keep_last) as writer:
+        for epoch in epochs:
+            loss = train_epoch(model, train_loader, optimizer, device)
+            if epoch % 5 == 0 or epoch == 1:
+                print(f"  Epoch {epoch:3d}  recon_loss={loss:.6f}")
+            if args.checkpoint_dir is not None:
+                writer.save(training_state(model, optimizer, epoch), epoch)
 
     save_reconstructions(model, test_loader, device)
     save_latent_tsne(model, test_loader, device)
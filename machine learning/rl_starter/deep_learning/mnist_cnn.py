@@ -5,15 +5,19 @@ Features:
   - Custom Conv → BatchNorm → ReLU → MaxPool architecture
   - OneCycleLR for fast convergence
   - Training curves and sample prediction plots
+  - Optional per-epoch full-state checkpoints; --resume continues an interrupted run
   - Achieves 99%+ accuracy in ~5 epochs
 
 Usage:
     python mnist_cnn.py --epochs 10 --device auto
+    python mnist_cnn.py --epochs 10 --device auto --preload
+    python mnist_cnn.py --epochs 10 --resume
 """
 
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
 import matplotlib
@@ -26,7 +30,15 @@ from torch.utils.data import DataLoader
 from torchvision import datasets, transforms
 from tqdm import tqdm
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.checkpoint import CheckpointWriter, latest_checkpoint, load_checkpoint, training_state
+from ml_utils.metrics import RunningMetrics
+from ml_utils.tensor_data import PreloadedImages
+
 OUTPUT_DIR = Path("outputs")
+CHECKPOINT_DIR = OUTPUT_DIR / "mnist_checkpoints"
 
 
 class MNISTNet(nn.Module):
@@ -72,7 +84,7 @@ def get_device(requested: str) -> torch.device:
 
 def train_epoch(model, loader, optimizer, scheduler, device):
     model.train()
-    total_loss, correct, total = 0.0, 0, 0
+    metrics = RunningMetrics(device)
     for images, labels in loader:
         images, labels = images.to(device), labels.to(device)
         optimizer.zero_grad()
@@ -81,23 +93,22 @@ def train_epoch(model, loader, optimizer, scheduler, device):
         loss.backward()
         optimizer.step()
         scheduler.step()
-        total_loss += loss.item() * images.size(0)
-        correct += (out.argmax(1) == labels).sum().item()
-        total += images.size(0)
-    return total_loss / total, correct / total
+        metrics.update(images.size(0), loss=loss * images.size(0), correct=(out.argmax(1) == labels).sum())
+    avg = metrics.compute()
+    return avg["loss"], avg["correct"]
 
 
 @torch.no_grad()
 def evaluate(model, loader, device):
     model.eval()
-    total_loss, correct, total = 0.0, 0, 0
+    metrics = RunningMetrics(device)
     for images, labels in loader:
         images, labels = images.to(device), labels.to(device)
         out = model(images)
-        total_loss += F.cross_entropy(out, labels).item() * images.size(0)
-        correct += (out.argmax(1) == labels).sum().item()
-        total += images.size(0)
-    return total_loss / total, correct / total
+        loss = F.cross_entropy(out, labels, reduction="sum")
+        metrics.update(images.size(0), loss=loss, correct=(out.argmax(1) == labels).sum())
+    avg = metrics.compute()
+    return avg["loss"], avg["correct"]
 
 
 def save_training_curves(history: dict, tag: str) -> None:
@@ -146,7 +157,19 @@ def main() -> None:
     parser.add_argument("--batch-size", type=int, default=128)
     parser.add_argument("--lr", type=float, default=1e-3)
     parser.add_argument("--device", choices=["auto", "cpu", "cuda"], default="auto")
+    parser.add_argument("--preload", action="store_true",
+                        help="Decode each split once into a uint8 tensor on the device; no DataLoader workers")
+    parser.add_argument("--checkpoint-dir", type=Path, default=None,
+                        help="Save a full-state checkpoint here every epoch (off by default; "
+                             "--resume alone uses outputs/mnist_checkpoints)")
+    parser.add_argument("--keep-last", type=int, default=3, help="Epoch checkpoints to keep (0 keeps all)")
+    parser.add_argument("--resume", action="store_true", help="Continue from the latest checkpoint in --checkpoint-dir")
     args = parser.parse_args()
+    if args.resume and args.checkpoint_dir is None:
+        args.checkpoint_dir = CHECKPOINT_DIR
+    if not args.resume and args.checkpoint_dir is not None and latest_checkpoint(args.checkpoint_dir) is not None:
+        parser.error(f"{args.checkpoint_dir} already holds checkpoints of an earlier run; "
+                     "pass --resume to continue it or a new --checkpoint-dir")
 
     device = get_device(args.device)
     print(f"Device: {device}")
@@ -154,8 +177,13 @@ def main() -> None:
     transform = transforms.Compose([transforms.ToTensor(), transforms.Normalize((0.1307,), (0.3081,))])
     train_ds = datasets.MNIST("data", train=True, download=True, transform=transform)
     test_ds = datasets.MNIST("data", train=False, download=True, transform=transform)
-    train_loader = DataLoader(train_ds, batch_size=args.batch_size, shuffle=True, num_workers=2, pin_memory=True)
-    test_loader = DataLoader(test_ds, batch_size=args.batch_size, shuffle=False, num_workers=2, pin_memory=True)
+    if args.preload:
+        opts = {"mean": (0.1307,), "std": (0.3081,), "device": device}
+        train_loader = PreloadedImages.from_dataset(train_ds, args.batch_size, shuffle=True, **opts)
+        test_loader = PreloadedImages.from_dataset(test_ds, args.batch_size, **opts)
+    else:
+        train_loader = DataLoader(train_ds, batch_size=args.batch_size, shuffle=True, num_workers=2, pin_memory=True)
+        test_loader = DataLoader(test_ds, batch_size=args.batch_size, shuffle=False, num_workers=2, pin_memory=True)
 
     model = MNISTNet().to(device)
     optimizer = torch.optim.AdamW(model.parameters(), lr=args.lr)
@@ -168,15 +196,30 @@ def main() -> None:
     print(f"Training for {args.epochs} epochs on {len(train_ds):,} samples\n")
 
     history = {"train_loss": [], "val_loss": [], "train_acc": [], "val_acc": []}
-
-    for epoch in tqdm(range(1, args.epochs + 1), desc="Training"):
-        tl, ta = train_epoch(model, train_loader, optimizer, scheduler, device)
-        vl, va = evaluate(model, test_loader, device)
-        history["train_loss"].append(tl)
-        history["val_loss"].append(vl)
-        history["train_acc"].append(ta)
-        history["val_acc"].append(va)
-        print(f"  Epoch {epoch:2d}  loss={tl:.4f}  acc={ta:.4f}  val_loss={vl:.4f}  val_acc={va:.4f}")
+    start_epoch = 1
+    checkpoint = latest_checkpoint(args.checkpoint_dir) if args.resume else None
+    if checkpoint is not None:
+        state = load_checkpoint(checkpoint, model, optimizer, scheduler, map_location=device)
+        if state["extra"].get("epochs", args.epochs) != args.epochs:
+            parser.error(f"{checkpoint} was saved by a {state['extra']['epochs']}-epoch run; resuming with "
+                         f"--epochs {args.epochs} would change its LR schedule")
+        start_epoch, history = state["epoch"] + 1, state["history"]
+        print(f"Resumed from {checkpoint} at epoch {start_epoch}")
+
+    epochs = tqdm(range(start_epoch, args.epochs + 1), desc="Training", initial=start_epoch - 1, total=args.epochs)
+    # closing the writer (also on an exception or Ctrl-C) flushes every queued snapshot
+    with CheckpointWriter(args.checkpoint_dir or OUTPUT_DIR, keep_last=args.keep_last) as writer:
+        for epoch in epochs:
+            tl, ta = train_epoch(model, train_loader, optimizer, scheduler, device)
+            vl, va = evaluate(model, test_loader, device)
+            history["train_loss"].append(tl)
+            history["val_loss"].append(vl)
+            history["train_acc"].append(ta)
+            history["val_acc"].append(va)
+            print(f"  Epoch {epoch:2d}  loss={tl:.4f}  acc={ta:.4f}  val_loss={vl:.4f}  val_acc={va:.4f}")
+            if args.checkpoint_dir is not None:
+                state = training_state(model, optimizer, epoch, scheduler, history=history, epochs=args.epochs)
+                writer.save(state, epoch)
 
     save_training_curves(history, "mnist")
     save_predictions(model, test_loader, device, "mnist")
@@ -0,0 +1,86 @@
+"""
+sync_benchmark.py — Training-step throughput with per-batch .item() vs RunningMetrics.
+
+Runs the same synthetic training steps twice per model: once reading
+``loss.item()`` and ``correct.sum().item()`` every batch (a host sync per
+step) and once accumulating them on the device with RunningMetrics and
+syncing once at the end.  The gap is the throughput the shared training
+loops recover; it is largest on GPUs with small, fast models.
+
+Usage:
+    python sync_benchmark.py --device cuda --steps 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import torch
+import torch.nn.functional as F
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.metrics import RunningMetrics
+from cifar10_resnet import CIFARResNet
+from mnist_cnn import MNISTNet, get_device
+
+
+def run(model, images, labels, steps: int, per_step_sync: bool) -> float:
+    """Steps per second of a plain SGD training loop."""
+    device = images.device
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.01, momentum=0.9)
+    sync = torch.cuda.synchronize if device.type == "cuda" else (lambda: None)
+    metrics = RunningMetrics(device)
+    total_loss, correct = 0.0, 0
+    for step in range(steps + 5):
+        if step == 5:  # warm-up done
+            sync()
+            start = time.perf_counter()
+        optimizer.zero_grad(set_to_none=True)
+        out = model(images)
+        loss = F.cross_entropy(out, labels)
+        loss.backward()
+        optimizer.step()
+        if per_step_sync:
+            total_loss += loss.item() * images.size(0)
+            correct += (out.argmax(1) == labels).sum().item()
+        else:
+            metrics.update(images.size(0), loss=loss * images.size(0), correct=(out.argmax(1) == labels).sum())
+    if not per_step_sync:
+        metrics.compute()
+    sync()
+    return steps / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-step sync vs on-device metric accumulation")
+    parser.add_argument("--device", choices=["auto", "cpu", "cuda"], default="auto")
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=128)
+    args = parser.parse_args()
+    if args.steps < 1:
+        parser.error("--steps must be at least 1")
+
+    device = get_device(args.device)
+    models = {
+        "MNISTNet (1×28×28)": (MNISTNet, (1, 28, 28)),
+        "CIFARResNet (3×32×32)": (CIFARResNet, (3, 32, 32)),
+    }
+    print(f"Training steps/sec on {device} (batch {args.batch_size}, {args.steps} steps)\n")
+    print(f"  {'model':<24s} {'.item()':>9s} {'on-device':>10s} {'speedup':>8s}")
+    for name, (cls, shape) in models.items():
+        images = torch.randn(args.batch_size, *shape, device=device)
+        labels = torch.randint(0, 10, (args.batch_size,), device=device)
+        rates = []
+        for per_step_sync in (True, False):
+            torch.manual_seed(0)
+            rates.append(run(cls().to(device).train(), images, labels, args.steps, per_step_sync))
+        print(f"  {name:<24s} {rates[0]:9.1f} {rates[1]:10.1f} {rates[1] / rates[0]:7.2f}×")
+
+
+if __name__ == "__main__":
+    main()
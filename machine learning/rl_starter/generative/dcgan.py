@@ -18,6 +18,7 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
 import matplotlib
@@ -31,6 +32,11 @@ from torchvision import datasets, transforms
 from torchvision.utils import make_grid
 from tqdm import tqdm
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.metrics import RunningMetrics
+
 OUTPUT_DIR = Path("outputs")
 LATENT_DIM = 100
 
@@ -191,7 +197,7 @@ def main() -> None:
     for epoch in tqdm(range(1, args.epochs + 1), desc="Training"):
         gen.train()
         disc.train()
-        g_loss_sum, d_loss_sum, n_batches = 0.0, 0.0, 0
+        metrics = RunningMetrics(device)
 
         for real, _ in loader:
             real = real.to(device)
@@ -216,12 +222,10 @@ def main() -> None:
             g_loss.backward()
             opt_g.step()
 
-            g_loss_sum += g_loss.item()
-            d_loss_sum += d_loss.item()
-            n_batches += 1
+            metrics.update(1, g=g_loss, d=d_loss)  # per-batch means
 
-        avg_g = g_loss_sum / n_batches
-        avg_d = d_loss_sum / n_batches
+        avg = metrics.compute()
+        avg_g, avg_d = avg["g"], avg["d"]
 
         if epoch % args.save_every == 0 or epoch == 1:
             gen.eval()
@@ -10,11 +10,13 @@ Features:
 
 Usage:
     python vae.py --epochs 30 --device auto
+    python vae.py --epochs 30 --device auto --preload
 """
 
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
 import matplotlib
@@ -29,6 +31,12 @@ from torchvision import datasets, transforms
 from torchvision.utils import make_grid
 from tqdm import tqdm
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.metrics import RunningMetrics
+from ml_utils.tensor_data import PreloadedImages
+
 OUTPUT_DIR = Path("outputs")
 LATENT_DIM = 16
 
@@ -103,7 +111,7 @@ def get_device(requested: str) -> torch.device:
 
 def train_epoch(model, loader, optimizer, device):
     model.train()
-    total_loss = 0.0
+    metrics = RunningMetrics(device)
     for images, _ in loader:
         images = images.to(device)
         recon, mu, logvar = model(images)
@@ -111,8 +119,8 @@ def train_epoch(model, loader, optimizer, device):
         optimizer.zero_grad()
         loss.backward()
         optimizer.step()
-        total_loss += loss.item()
-    return total_loss / len(loader.dataset)
+        metrics.update(images.size(0), loss=loss)  # elbo_loss is summed over the batch
+    return metrics.compute()["loss"]
 
 
 @torch.no_grad()
@@ -220,6 +228,8 @@ def main() -> None:
     parser.add_argument("--latent-dim", type=int, default=LATENT_DIM)
     parser.add_argument("--lr", type=float, default=1e-3)
     parser.add_argument("--device", choices=["auto", "cpu", "cuda"], default="auto")
+    parser.add_argument("--preload", action="store_true",
+                        help="Decode each split once into a uint8 tensor on the device; no DataLoader workers")
     args = parser.parse_args()
 
     device = get_device(args.device)
@@ -228,8 +238,12 @@ def main() -> None:
     transform = transforms.Compose([transforms.ToTensor()])
     train_ds = datasets.MNIST("data", train=True, download=True, transform=transform)
     test_ds = datasets.MNIST("data", train=False, download=True, transform=transform)
-    train_loader = DataLoader(train_ds, batch_size=args.batch_size, shuffle=True, num_workers=2, pin_memory=True)
-    test_loader = DataLoader(test_ds, batch_size=args.batch_size, shuffle=False, num_workers=2, pin_memory=True)
+    if args.preload:
+        train_loader = PreloadedImages.from_dataset(train_ds, args.batch_size, shuffle=True, device=device)
+        test_loader = PreloadedImages.from_dataset(test_ds, args.batch_size, device=device)
+    else:
+        train_loader = DataLoader(train_ds, batch_size=args.batch_size, shuffle=True, num_workers=2, pin_memory=True)
+        test_loader = DataLoader(test_ds, batch_size=args.batch_size, shuffle=False, num_workers=2, pin_memory=True)
 
     model = VAE(args.latent_dim).to(device)
     optimizer = torch.optim.Adam(model.parameters(), lr=args.lr)
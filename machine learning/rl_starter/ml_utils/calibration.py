@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import numpy as np
+from scipy.optimize import minimize
+from scipy.special import expit, softmax
+from sklearn.base import BaseEstimator, ClassifierMixin, MetaEstimatorMixin, clone
+from sklearn.isotonic import IsotonicRegression
+from sklearn.model_selection import cross_val_predict
+
+METHODS = ("sigmoid", "isotonic", "decision")
+
+
+def _fit_sigmoid(scores: np.ndarray, is_pos: np.ndarray) -> tuple[float, float]:
+    """Platt scaling ``P(pos | s) = 1 / (1 + exp(a·s + b))`` fitted with Platt's smoothed targets."""
+    n_pos = is_pos.sum()
+    n_neg = len(is_pos) - n_pos
+    target = np.where(is_pos, (n_pos + 1) / (n_pos + 2), 1 / (n_neg + 2))
+
+    def loss(ab):
+        z = ab[0] * scores + ab[1]
+        residual = target - expit(-z)
+        value = np.sum(target * np.logaddexp(0, z) + (1 - target) * np.logaddexp(0, -z))
+        return value, np.array([residual @ scores, residual.sum()])
+
+    start = np.array([0.0, np.log((n_neg + 1) / (n_pos + 1))])
+    a, b = minimize(loss, start, jac=True, method="L-BFGS-B").x
+    return a, b
+
+
+def fit_calibrators(scores: np.ndarray, y: np.ndarray, classes: np.ndarray, method: str) -> list:
+    """One-vs-rest calibrators mapping held-out decision scores to probabilities.
+
+    ``scores`` are out-of-fold ``decision_function`` values: 1-D for binary
+    problems (positive class ``classes[1]``), one column per class otherwise.
+    """
+    if method not in ("sigmoid", "isotonic"):
+        raise ValueError(f"method must be 'sigmoid' or 'isotonic', got {method!r}")
+    scores = scores[:, None] if scores.ndim == 1 else scores
+    targets = [classes[1]] if len(classes) == 2 else classes
+    calibrators = []
+    for k, label in enumerate(targets):
+        is_pos = y == label
+        if method == "sigmoid":
+            calibrators.append(_fit_sigmoid(scores[:, k], is_pos))
+        else:
+            calibrators.append(IsotonicRegression(out_of_bounds="clip").fit(scores[:, k], is_pos))
+    return calibrators
+
+
+def calibrated_proba(scores: np.ndarray, method: str, calibrators: list | None = None) -> np.ndarray:
+    """``predict_proba``-shaped probabilities from decision scores.
+
+    ``method="decision"`` needs no calibrators: binary scores go through a
+    logistic, multiclass scores through a softmax.
+    """
+    if method == "decision":
+        if scores.ndim == 1:
+            p = expit(scores)
+            return np.column_stack([1 - p, p])
+        return softmax(scores, axis=1)
+    scores = scores[:, None] if scores.ndim == 1 else scores
+    cols = []
+    for k, cal in enumerate(calibrators):
+        cols.append(expit(-(cal[0] * scores[:, k] + cal[1])) if method == "sigmoid" else cal.predict(scores[:, k]))
+    if len(cols) == 1:
+        return np.column_stack([1 - cols[0], cols[0]])
+    proba = np.column_stack(cols)
+    total = proba.sum(axis=1, keepdims=True)
+    # rows where every calibrator says 0 get a uniform distribution, as in CalibratedClassifierCV
+    return np.divide(proba, total, out=np.full_like(proba, 1 / proba.shape[1]), where=total > 0)
+
+
+def cross_fit_calibrated_proba(scores: np.ndarray, y: np.ndarray, classes: np.ndarray, method: str,
+                               splits) -> np.ndarray:
+    """Out-of-fold probabilities for out-of-fold ``scores``: each test fold is calibrated by
+    calibrators fitted on the other folds' scores, never on its own rows."""
+    if method == "decision":
+        return calibrated_proba(scores, method)
+    proba = np.empty((len(scores), len(classes)))
+    for train_idx, test_idx in splits:
+        calibrators = fit_calibrators(scores[train_idx], y[train_idx], classes, method)
+        proba[test_idx] = calibrated_proba(scores[test_idx], method, calibrators)
+    return proba
+
+
+class DecisionCalibratedClassifier(MetaEstimatorMixin, ClassifierMixin, BaseEstimator):
+    """``predict_proba`` for a margin classifier (e.g. ``SVC``) without ``probability=True``.
+
+    The wrapped estimator is fitted once on all rows; ``sigmoid`` / ``isotonic``
+    calibrators are fitted on ``cv`` out-of-fold ``decision_function`` scores,
+    and ``decision`` uses the raw scores through a logistic / softmax.  libsvm's
+    ``probability=True`` instead runs its own 5-fold Platt scaling inside every fit.
+
+    With ``calibrate=False`` only the margin model is fitted and ``predict_proba``
+    falls back to ``decision``: cross-validation and tuning score the uncalibrated
+    model, and the ``cv`` calibration fits run once, on the final refit.
+    """
+
+    def __init__(self, estimator, method: str = "sigmoid", cv=5, calibrate: bool = True):
+        self.estimator = estimator
+        self.method = method
+        self.cv = cv
+        self.calibrate = calibrate
+
+    def fit(self, X, y):
+        if self.method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}, got {self.method!r}")
+        self.estimator_ = clone(self.estimator).fit(X, y)
+        self.classes_ = self.estimator_.classes_
+        self.calibrators_ = None
+        if self.method != "decision" and self.calibrate:
+            oof = cross_val_predict(clone(self.estimator), X, y, cv=self.cv, method="decision_function")
+            self.calibrators_ = fit_calibrators(oof, np.asarray(y), self.classes_, self.method)
+        return self
+
+    def decision_function(self, X) -> np.ndarray:
+        return self.estimator_.decision_function(X)
+
+    def predict(self, X) -> np.ndarray:
+        return self.estimator_.predict(X)
+
+    def predict_proba(self, X) -> np.ndarray:
+        method = self.method if self.calibrators_ is not None else "decision"
+        return calibrated_proba(self.decision_function(X), method, self.calibrators_)
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import copy
+import os
+import queue
+import random
+import threading
+from pathlib import Path
+
+import numpy as np
+import torch
+
+
+def _snapshot(obj):
+    """Deep copy with every tensor copied to CPU, so training can keep mutating the originals."""
+    if torch.is_tensor(obj):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: _snapshot(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_snapshot(v) for v in obj)
+    return copy.deepcopy(obj)
+
+
+def capture_rng() -> dict:
+    state = {"python": random.getstate(), "numpy": np.random.get_state(), "torch": torch.get_rng_state()}
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def restore_rng(state: dict) -> None:
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+
+def training_state(model, optimizer, epoch: int, scheduler=None, scaler=None, history=None, **extra) -> dict:
+    """Everything needed to continue a run on the same trajectory after ``epoch``."""
+    model = getattr(model, "_orig_mod", model)  # unwrap torch.compile
+    return {
+        "epoch": epoch,
+        "model": model.state_dict(),
+        "optimizer": optimizer.state_dict(),
+        "scheduler": scheduler.state_dict() if scheduler is not None else None,
+        "scaler": scaler.state_dict() if scaler is not None else None,
+        "rng": capture_rng(),
+        "history": history,
+        "extra": extra,
+    }
+
+
+def load_checkpoint(path: Path, model, optimizer=None, scheduler=None, scaler=None, map_location=None) -> dict:
+    """Restore model / optimizer / scheduler / scaler / RNG state in place; return the checkpoint dict."""
+    # RNG and history entries are plain Python objects, so this is not a weights-only load
+    state = torch.load(path, map_location=map_location, weights_only=False)
+    getattr(model, "_orig_mod", model).load_state_dict(state["model"])
+    if optimizer is not None:
+        optimizer.load_state_dict(state["optimizer"])
+    if scheduler is not None and state["scheduler"] is not None:
+        scheduler.load_state_dict(state["scheduler"])
+    if scaler is not None and state["scaler"] is not None:
+        scaler.load_state_dict(state["scaler"])
+    restore_rng(state["rng"])
+    return state
+
+
+def latest_checkpoint(directory: Path, prefix: str = "checkpoint") -> Path | None:
+    paths = sorted(Path(directory).glob(f"{prefix}_*.pt"))
+    return paths[-1] if paths else None
+
+
+class CheckpointWriter:
+    """Writes checkpoints on a background thread so ``torch.save`` never blocks a training step.
+
+    ``save`` takes a CPU snapshot on the caller's thread (the only part that
+    must see a consistent state) and queues it; the writer thread saves to a
+    temporary file, renames it into place atomically and deletes all but the
+    newest ``keep_last`` numbered checkpoints.  At most ``max_pending``
+    snapshots wait in memory; further saves block until one is written.
+    """
+
+    def __init__(self, directory: Path, keep_last: int = 3, prefix: str = "checkpoint", max_pending: int = 2):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.keep_last = keep_last
+        self.prefix = prefix
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def save(self, state: dict, step: int) -> Path:
+        """Queue a numbered checkpoint (subject to ``keep_last`` retention)."""
+        path = self.directory / f"{self.prefix}_{step:06d}.pt"
+        self._put(state, path, retain=True)
+        return path
+
+    def save_as(self, obj, path: Path) -> None:
+        """Queue any object (e.g. a best-model ``state_dict``) to ``path``, outside retention."""
+        self._put(obj, Path(path), retain=False)
+
+    def _put(self, obj, path: Path, retain: bool) -> None:
+        if self._error is not None:
+            raise RuntimeError("checkpoint writer failed") from self._error
+        self._queue.put((_snapshot(obj), path, retain))
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                obj, path, retain = item
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(path.name + ".tmp")
+                torch.save(obj, tmp)
+                os.replace(tmp, path)
+                if retain and self.keep_last > 0:
+                    for old in sorted(self.directory.glob(f"{self.prefix}_*.pt"))[:-self.keep_last]:
+                        old.unlink(missing_ok=True)
+            except BaseException as exc:  # surfaced on the next save / close
+                self._error = exc
+            finally:
+                self._queue.task_done()
+
+    def close(self) -> None:
+        """Wait for every queued checkpoint to be on disk."""
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError("checkpoint writer failed") from self._error
+
+    def __enter__(self) -> "CheckpointWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
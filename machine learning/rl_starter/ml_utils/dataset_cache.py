@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+DEFAULT_CACHE_DIR = Path(".csv_cache")
+DEFAULT_MAX_BYTES = 4 * 2**30  # least recently used entries beyond this are evicted
+FORMAT_VERSION = 1
+
+
+def file_digest(path: Path, index: dict | None = None) -> str:
+    """BLAKE2b of the file contents, memoised in ``index`` by (path, size, mtime)."""
+    st = path.stat()
+    stamp = f"{path.resolve()}:{st.st_size}:{st.st_mtime_ns}"
+    if index is not None and stamp in index:
+        return index[stamp]
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    digest = h.hexdigest()
+    if index is not None:
+        index[stamp] = digest
+    return digest
+
+
+def cache_key(path: Path, read_kwargs: dict, index: dict | None = None) -> str:
+    opts = json.dumps(read_kwargs, sort_keys=True, default=repr)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{FORMAT_VERSION}:{file_digest(path, index)}:{opts}".encode())
+    return h.hexdigest()
+
+
+# ── npy-per-column format ───────────────────────────────────────
+
+
+def _write_npy(df: pd.DataFrame, out: Path) -> None:
+    columns = []
+    for i, col in enumerate(df.columns):
+        s = df[col]
+        fname = f"{i}.npy"
+        if isinstance(s.dtype, pd.CategoricalDtype) or not (
+            pd.api.types.is_numeric_dtype(s) or pd.api.types.is_datetime64_dtype(s)
+        ):
+            # text is stored as int32 codes + a categories array so the codes can be memory-mapped
+            cat = s.astype("category")
+            np.save(out / fname, cat.cat.codes.to_numpy(dtype=np.int32))
+            np.save(out / f"{i}.categories.npy", cat.cat.categories.to_numpy(dtype=object), allow_pickle=True)
+            kind = "codes"
+        else:
+            np.save(out / fname, s.to_numpy())
+            kind = "array"
+        columns.append({"name": col, "file": fname, "kind": kind, "dtype": str(s.dtype)})
+    (out / "meta.json").write_text(json.dumps({"format": "npy", "columns": columns}, default=str))
+
+
+def _read_npy(out: Path, meta: dict) -> pd.DataFrame:
+    data = {}
+    for i, c in enumerate(meta["columns"]):
+        arr = np.load(out / c["file"], mmap_mode="r")
+        if c["kind"] == "codes":
+            categories = np.load(out / f"{i}.categories.npy", allow_pickle=True)
+            values = pd.Categorical.from_codes(np.asarray(arr), categories=categories)
+            data[c["name"]] = values if c["dtype"] == "category" else pd.Series(values).astype(c["dtype"])
+        else:
+            data[c["name"]] = arr
+    return pd.DataFrame(data, copy=False)
+
+
+def _read_entry(entry: Path) -> pd.DataFrame:
+    meta = json.loads((entry / "meta.json").read_text())
+    if meta["format"] == "feather":
+        df = feather.read_feather(entry / "data.feather", memory_map=True)
+    else:
+        df = _read_npy(entry, meta)
+    if meta.get("index"):
+        df = df.set_index(meta["index"])
+        df.index.names = meta["index_names"]
+    return df
+
+
+def _write_json(path: Path, obj) -> None:
+    """Replace ``path`` atomically, so a concurrent reader never sees a partial file."""
+    tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    tmp.write_text(json.dumps(obj, default=str))
+    os.replace(tmp, path)
+
+
+def _evict(cache_dir: Path, max_bytes: int, keep: Path) -> None:
+    """Delete least recently used entries (by ``meta.json`` mtime, touched on every hit) until the
+    cache fits in ``max_bytes``; ``keep`` is never deleted.  Open memory maps stay valid on POSIX."""
+    entries = []
+    for entry in cache_dir.iterdir():
+        if entry.is_dir() and ".tmp" not in entry.name and (entry / "meta.json").exists():
+            size = sum(f.stat().st_size for f in entry.iterdir())
+            entries.append(((entry / "meta.json").stat().st_mtime_ns, size, entry))
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries):
+        if total <= max_bytes:
+            break
+        if entry != keep:
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+
+# ── public API ──────────────────────────────────────────────────
+
+
+def cached_read_csv(
+    path: str | Path,
+    cache_dir: Path | None = DEFAULT_CACHE_DIR,
+    fmt: str = "npy",
+    max_bytes: int | None = DEFAULT_MAX_BYTES,
+    **read_kwargs,
+) -> pd.DataFrame:
+    """``pd.read_csv`` backed by a binary columnar cache.
+
+    The first call parses the CSV and stores it as one ``.npy`` per column
+    (``fmt="npy"``) or as uncompressed Feather (``fmt="feather"``, needs
+    pyarrow).  Later calls with the same file contents and read options load
+    from the cache.  Either way the frame is read back from the cache, so its
+    numeric columns are read-only memory maps on a hit and a miss alike:
+    treat it as read-only and ``.copy()`` before mutating in place.  Entries
+    beyond ``max_bytes`` (``None``: unbounded) are evicted least recently
+    used first.  Pass ``cache_dir=None`` to bypass the cache entirely.
+    """
+    path = Path(path)
+    if cache_dir is None:
+        return pd.read_csv(path, **read_kwargs)
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    index_file = cache_dir / "index.json"
+    index = json.loads(index_file.read_text()) if index_file.exists() else {}
+    key = cache_key(path, read_kwargs, index)
+    entry = cache_dir / key
+    if (entry / "meta.json").exists():
+        os.utime(entry / "meta.json")  # recency for eviction
+        return _read_entry(entry)
+
+    df = pd.read_csv(path, **read_kwargs)
+    tmp = cache_dir / f"{key}.tmp{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+    flat = df
+    index_cols: list[str] = []
+    if not isinstance(df.index, pd.RangeIndex):
+        index_cols = [f"__index_{i}__" for i in range(df.index.nlevels)]
+        flat = df.reset_index(names=index_cols)
+    if fmt == "feather" and HAS_ARROW:
+        feather.write_feather(flat, tmp / "data.feather", compression="uncompressed")
+        meta = {"format": "feather"}
+    else:
+        _write_npy(flat, tmp)
+        meta = json.loads((tmp / "meta.json").read_text())
+    meta.update(index=index_cols, index_names=list(df.index.names))
+    (tmp / "meta.json").write_text(json.dumps(meta, default=str))
+    try:
+        tmp.rename(entry)
+    except OSError:  # another process populated the entry first
+        shutil.rmtree(tmp, ignore_errors=True)
+    _write_json(index_file, index)
+    if max_bytes is not None:
+        _evict(cache_dir, max_bytes, keep=entry)
+    # read back so a miss returns the same read-only, memory-mapped frame as a hit
+    return _read_entry(entry)
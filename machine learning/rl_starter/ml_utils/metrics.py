@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import torch
+
+
+class RunningMetrics:
+    """Running metric sums kept as device tensors, read back with one host sync.
+
+    ``loss.item()`` and ``(...).sum().item()`` block the host until the GPU
+    has finished the step, which stalls the kernel queue every batch.
+    ``update`` only issues asynchronous in-place adds; ``compute`` (once per
+    epoch or logging interval) copies every sum back in a single transfer.
+
+        metrics = RunningMetrics(device)
+        for x, y in loader:
+            ...
+            metrics.update(x.size(0), loss=loss * x.size(0), correct=(out.argmax(1) == y).sum())
+        avg = metrics.compute()      # {"loss": mean loss per sample, "correct": accuracy}
+    """
+
+    def __init__(self, device: torch.device | str) -> None:
+        self.device = torch.device(device)
+        # float64 sums do not drift over long epochs; MPS has no float64
+        self.dtype = torch.float32 if self.device.type == "mps" else torch.float64
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self._sums: dict[str, torch.Tensor] = {}
+
+    @torch.no_grad()
+    def update(self, n: int = 1, **sums: torch.Tensor) -> None:
+        """Add ``n`` samples (a Python int, so no sync) and each batch sum in ``sums``."""
+        self.count += n
+        for name, value in sums.items():
+            value = value.detach().to(self.dtype)
+            if name in self._sums:
+                self._sums[name].add_(value)
+            else:
+                self._sums[name] = value.clone()
+
+    def sums(self) -> dict[str, float]:
+        """Every running sum as a float, fetched with one device → host copy."""
+        if not self._sums:
+            return {}
+        values = torch.stack(list(self._sums.values())).tolist()
+        return dict(zip(self._sums, values))
+
+    def compute(self) -> dict[str, float]:
+        """Each running sum divided by the number of samples seen."""
+        return {name: value / max(self.count, 1) for name, value in self.sums().items()}
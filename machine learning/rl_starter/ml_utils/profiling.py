@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _rss_bytes() -> int | None:
+    """Resident set size of this process plus its worker children, if measurable."""
+    if HAS_PSUTIL:
+        proc = psutil.Process(os.getpid())
+        total = proc.memory_info().rss
+        for child in proc.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+    if resource is not None:
+        # high-water mark of the whole run only: KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    return None
+
+
+def _cpu_seconds() -> float:
+    """User + system CPU of this process and its (live or reaped) children."""
+    if HAS_PSUTIL:
+        proc = psutil.Process(os.getpid())
+        t = proc.cpu_times()
+        total = t.user + t.system + t.children_user + t.children_system
+        for child in proc.children(recursive=True):
+            try:
+                c = child.cpu_times()
+                total += c.user + c.system
+            except psutil.Error:
+                pass
+        return total
+    return time.process_time()
+
+
+class StageProfiler:
+    """Records wall time, CPU time and peak RSS for named pipeline stages.
+
+    ``stage()`` is a no-op when disabled, so scripts can wrap their stages
+    unconditionally.  Peak RSS is sampled on a background thread (process
+    and workers) when psutil is installed; otherwise it falls back to the
+    process-lifetime high-water mark.  A stage given a ``cache`` (anything
+    with ``hits`` / ``misses`` counters, e.g. ``ResultCache``) is marked
+    ``cached`` or ``partly cached`` when it was served from that cache, so
+    its time is not mistaken for compute cost.
+    """
+
+    def __init__(self, enabled: bool = True, sample_interval: float = 0.05):
+        self.enabled = enabled
+        self.sample_interval = sample_interval
+        self.stages: list[dict] = []
+        self.models: dict[str, dict] = {}
+
+    @contextmanager
+    def stage(self, name: str, cache=None):
+        if not self.enabled:
+            yield
+            return
+        peak = [_rss_bytes() or 0]
+        stop = threading.Event()
+
+        def sample():
+            while not stop.wait(self.sample_interval):
+                peak[0] = max(peak[0], _rss_bytes() or 0)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        wall, cpu = time.perf_counter(), _cpu_seconds()
+        counts = (cache.hits, cache.misses) if cache is not None else None
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, _cpu_seconds() - cpu
+            stop.set()
+            sampler.join()
+            peak[0] = max(peak[0], _rss_bytes() or 0)
+            cached = None
+            if counts is not None and cache.hits > counts[0]:
+                cached = "cached" if cache.misses == counts[1] else "partly cached"
+            self.stages.append({
+                "stage": name,
+                "wall_s": wall,
+                "cpu_s": cpu,
+                "peak_rss_mb": peak[0] / 2**20 if peak[0] else None,
+                "cached": cached,
+            })
+
+    def time_model(self, name: str, model, X_train, y_train, X_test) -> None:
+        """Fit once and predict once, recording latency per 1k rows."""
+        if not self.enabled:
+            return
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_s = time.perf_counter() - start
+        start = time.perf_counter()
+        model.predict(X_test)
+        predict_s = time.perf_counter() - start
+        self.models[name] = {
+            "fit_s_per_1k_rows": fit_s / len(X_train) * 1000,
+            "predict_ms_per_1k_rows": predict_s / len(X_test) * 1e6,
+        }
+
+    def report(self, path: Path, meta: dict | None = None) -> None:
+        """Write ``<path>.json`` and a ``<path>.png`` chart of per-stage wall vs CPU time."""
+        if not self.enabled:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"meta": meta or {}, "stages": self.stages, "models": self.models}
+        json_path = path.with_suffix(".json")
+        json_path.write_text(json.dumps(data, indent=2))
+
+        print(f"\nProfile ({sum(s['wall_s'] for s in self.stages):.1f}s total):")
+        for s in sorted(self.stages, key=lambda s: -s["wall_s"]):
+            rss = f"{s['peak_rss_mb']:8.0f} MB" if s["peak_rss_mb"] else "       n/a"
+            cached = f"  ({s['cached']})" if s["cached"] else ""
+            print(f"  {s['stage']:<34s} wall {s['wall_s']:7.2f}s  cpu {s['cpu_s']:7.2f}s  peak {rss}{cached}")
+
+        names = [s["stage"] + (f" ({s['cached']})" if s["cached"] else "") for s in self.stages]
+        n_rows = len(names) + len(self.models)
+        fig, axes = plt.subplots(1, 2 if self.models else 1, figsize=(14 if self.models else 9, max(4, n_rows * 0.3)))
+        ax = axes[0] if self.models else axes
+        y = range(len(names))
+        ax.barh([i + 0.2 for i in y], [s["wall_s"] for s in self.stages], height=0.4, color="#2bb0a7", label="wall")
+        ax.barh([i - 0.2 for i in y], [s["cpu_s"] for s in self.stages], height=0.4, color="#f2b14c", label="CPU")
+        ax.set_yticks(list(y))
+        ax.set_yticklabels(names)
+        ax.invert_yaxis()
+        ax.set_xlabel("seconds")
+        ax.set_title("Stage time")
+        ax.legend()
+        if self.models:
+            model_names = list(self.models)
+            axes[1].barh(model_names, [self.models[m]["predict_ms_per_1k_rows"] for m in model_names], color="#2bb0a7")
+            axes[1].invert_yaxis()
+            axes[1].set_xlabel("predict ms per 1k rows")
+            axes[1].set_title("Model predict latency")
+        fig.tight_layout()
+        fig.savefig(path.with_suffix(".png"), dpi=150)
+        plt.close(fig)
+        print(f"  Saved {json_path} and {path.with_suffix('.png')}")
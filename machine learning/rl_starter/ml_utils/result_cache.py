@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+import joblib
+
+DEFAULT_RESULT_DIR = Path(".result_cache")
+FORMAT_VERSION = 2
+
+
+def estimator_key(estimator) -> tuple[str, str]:
+    """Class name plus a hash of ``get_params``, stable across processes and runs."""
+    return type(estimator).__qualname__, joblib.hash(estimator.get_params())
+
+
+class ResultCache:
+    """Persistent store of CV scores and fitted tuning results for one experiment context.
+
+    ``context`` (dataset content hash, split seed, preprocessor config, …) is
+    folded into every key, so changing any of it misses cleanly.  Scores are
+    appended to ``scores.jsonl`` as soon as they are computed, which is what
+    lets an interrupted search resume; fitted objects go to ``<key>.joblib``.
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_RESULT_DIR, context: dict | None = None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.context = joblib.hash({"version": FORMAT_VERSION, **(context or {})})
+        self.scores_path = self.cache_dir / "scores.jsonl"
+        self._scores: dict[str, Any] = {}
+        if self.scores_path.exists():
+            for line in self.scores_path.read_text().splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:  # torn last line from an interrupted run
+                    continue
+                self._scores[entry["key"]] = entry["value"]
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, *parts) -> str:
+        return joblib.hash((self.context, parts))
+
+    def get(self, key: str, default=None):
+        if key in self._scores:
+            self.hits += 1
+            return self._scores[key]
+        self.misses += 1
+        return default
+
+    def put(self, key: str, value) -> None:
+        self._scores[key] = value
+        with open(self.scores_path, "a") as f:
+            f.write(json.dumps({"key": key, "value": value}) + "\n")
+
+    def load_object(self, key: str):
+        path = self.cache_dir / f"{key}.joblib"
+        if not path.exists():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return joblib.load(path)
+
+    def save_object(self, key: str, obj) -> None:
+        tmp = self.cache_dir / f"{key}.joblib.tmp"
+        joblib.dump(obj, tmp)
+        os.replace(tmp, self.cache_dir / f"{key}.joblib")
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses ({self.cache_dir})"
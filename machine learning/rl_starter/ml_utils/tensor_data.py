@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import torch
+from torch.utils.data import TensorDataset
+
+GRAY_WEIGHTS = (0.299, 0.587, 0.114)  # ITU-R 601-2 luma, as torchvision's rgb_to_grayscale
+
+
+class BatchAugment:
+    """RandomCrop(padding) → RandomHorizontalFlip → ColorJitter(brightness, contrast) on whole uint8 batches.
+
+    Same semantics as the per-image torchvision transforms, applied with
+    vectorised tensor ops: crops gather from a zero-padded batch at
+    per-sample offsets, flips are a per-sample mask, and brightness /
+    contrast factors are drawn per sample and applied in a per-sample random
+    order.  Every random draw comes from one CPU generator, so a given
+    ``seed`` reproduces the same augmentations on any device.
+    """
+
+    def __init__(self, padding: int = 4, flip: bool = True, brightness: float = 0.0, contrast: float = 0.0,
+                 seed: int | None = None) -> None:
+        self.padding = padding
+        self.flip = flip
+        self.brightness = brightness
+        self.contrast = contrast
+        self.generator = torch.Generator()
+        if seed is None:
+            self.generator.seed()
+        else:
+            self.generator.manual_seed(seed)
+
+    def _uniform(self, n: int, spread: float, device) -> torch.Tensor:
+        low, high = max(0.0, 1 - spread), 1 + spread
+        return (torch.rand(n, generator=self.generator) * (high - low) + low).view(-1, 1, 1, 1).to(device)
+
+    def crop(self, images: torch.Tensor) -> torch.Tensor:
+        n, c, h, w = images.shape
+        p = self.padding
+        padded = torch.nn.functional.pad(images, (p, p, p, p))
+        top = torch.randint(0, 2 * p + 1, (n,), generator=self.generator).to(images.device)
+        left = torch.randint(0, 2 * p + 1, (n,), generator=self.generator).to(images.device)
+        rows = (top[:, None] + torch.arange(h, device=images.device)).view(n, 1, h, 1).expand(n, c, h, w + 2 * p)
+        cols = (left[:, None] + torch.arange(w, device=images.device)).view(n, 1, 1, w).expand(n, c, h, w)
+        return padded.gather(2, rows).gather(3, cols)
+
+    def jitter(self, x: torch.Tensor) -> torch.Tensor:
+        n = x.shape[0]
+        ops = []
+        if self.brightness:
+            b = self._uniform(n, self.brightness, x.device)
+            ops.append(lambda t: (t * b).clamp_(0, 1))
+        if self.contrast:
+            c = self._uniform(n, self.contrast, x.device)
+            weights = torch.tensor(GRAY_WEIGHTS, device=x.device).view(1, 3, 1, 1)
+
+            def adjust_contrast(t):
+                gray = t if t.shape[1] == 1 else (t * weights).sum(1, keepdim=True)
+                return (c * t + (1 - c) * gray.mean((2, 3), keepdim=True)).clamp_(0, 1)
+
+            ops.append(adjust_contrast)
+        if len(ops) < 2:
+            return ops[0](x) if ops else x
+        # ColorJitter applies its enabled ops in a random order per image
+        first = (torch.rand(n, generator=self.generator) < 0.5).view(-1, 1, 1, 1).to(x.device)
+        return torch.where(first, ops[1](ops[0](x)), ops[0](ops[1](x)))
+
+    def __call__(self, images: torch.Tensor) -> torch.Tensor:
+        """uint8 ``(N, C, H, W)`` batch → augmented float batch in [0, 1]."""
+        if self.padding:
+            images = self.crop(images)
+        if self.flip:
+            mask = (torch.rand(images.shape[0], generator=self.generator) < 0.5).view(-1, 1, 1, 1)
+            images = torch.where(mask.to(images.device), images.flip(3), images)
+        return self.jitter(images.float().div_(255))
+
+
+class PreloadedImages:
+    """A whole image split held as one contiguous uint8 ``(N, C, H, W)`` tensor.
+
+    Iterating yields ``(images, labels)`` float batches like a DataLoader over
+    ``ToTensor() → Normalize(mean, std)``, but scaling and normalisation run
+    once per batch as tensor ops and shuffling is a ``randperm`` over indices,
+    so there is no per-item Python work and no worker processes.  With
+    ``device`` set the uint8 data lives there and batches never cross the bus.
+    ``augment`` (e.g. :class:`BatchAugment`) maps each uint8 batch to floats
+    in [0, 1] before normalisation.
+    """
+
+    def __init__(
+        self,
+        images,
+        labels,
+        batch_size: int,
+        shuffle: bool = False,
+        mean: tuple[float, ...] | None = None,
+        std: tuple[float, ...] | None = None,
+        device: torch.device | str | None = None,
+        drop_last: bool = False,
+        augment=None,
+    ) -> None:
+        images = torch.as_tensor(np.asarray(images)) if not torch.is_tensor(images) else images
+        if images.ndim == 3:  # (N, H, W) greyscale
+            images = images.unsqueeze(1)
+        elif images.shape[-1] in (1, 3) and images.shape[1] not in (1, 3):  # (N, H, W, C)
+            images = images.permute(0, 3, 1, 2)
+        self.images = images.contiguous().to(device or "cpu")
+        self.labels = torch.as_tensor(np.asarray(labels), dtype=torch.long).to(self.images.device)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.augment = augment
+        shape = (1, -1, 1, 1)
+        self.mean = None if mean is None else torch.tensor(mean, device=self.images.device).view(shape)
+        self.std = None if std is None else torch.tensor(std, device=self.images.device).view(shape)
+
+    @classmethod
+    def from_dataset(cls, dataset, batch_size: int, **kwargs) -> "PreloadedImages":
+        """Preload a torchvision MNIST / FashionMNIST / CIFAR dataset from its decoded ``data`` array."""
+        return cls(dataset.data, dataset.targets, batch_size, **kwargs)
+
+    @property
+    def dataset(self) -> TensorDataset:
+        """The preloaded (uint8) samples, so ``len(loader.dataset)`` counts samples as for a DataLoader."""
+        return TensorDataset(self.images, self.labels)
+
+    def __len__(self) -> int:
+        n = len(self.labels)
+        return n // self.batch_size if self.drop_last else math.ceil(n / self.batch_size)
+
+    def to_float(self, images: torch.Tensor) -> torch.Tensor:
+        """uint8 batch → float in [0, 1] (as ``ToTensor``, after ``augment``), then normalised (as ``Normalize``)."""
+        x = self.augment(images) if self.augment is not None else images.float().div_(255)
+        if self.mean is not None:
+            x.sub_(self.mean).div_(self.std)
+        return x
+
+    def __iter__(self):
+        n = len(self.labels)
+        device = self.images.device
+        order = torch.randperm(n).to(device) if self.shuffle else torch.arange(n, device=device)
+        for i in range(len(self)):
+            idx = order[i * self.batch_size:(i + 1) * self.batch_size]
+            yield self.to_float(self.images[idx]), self.labels[idx]
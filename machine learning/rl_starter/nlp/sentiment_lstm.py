@@ -16,6 +16,7 @@ from __future__ import annotations
 
 import argparse
 import re
+import sys
 from collections import Counter
 from pathlib import Path
 
@@ -29,6 +30,11 @@ from torch.nn.utils.rnn import pack_padded_sequence, pad_sequence
 from torch.utils.data import DataLoader, Dataset
 from tqdm import tqdm
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.metrics import RunningMetrics
+
 OUTPUT_DIR = Path("outputs")
 
 # ── dataset ─────────────────────────────────────────────────────
@@ -164,7 +170,7 @@ def get_device(requested: str) -> torch.device:
 
 def train_epoch(model, loader, optimizer, device):
     model.train()
-    total_loss, correct, total = 0.0, 0, 0
+    metrics = RunningMetrics(device)
     for seqs, labels, lengths in loader:
         seqs, labels, lengths = seqs.to(device), labels.to(device), lengths.to(device)
         optimizer.zero_grad()
@@ -173,26 +179,24 @@ def train_epoch(model, loader, optimizer, device):
         loss.backward()
         nn.utils.clip_grad_norm_(model.parameters(), 1.0)
         optimizer.step()
-        total_loss += loss.item() * seqs.size(0)
         preds = (logits > 0).long()
-        correct += (preds == labels.long()).sum().item()
-        total += seqs.size(0)
-    return total_loss / total, correct / total
+        metrics.update(seqs.size(0), loss=loss * seqs.size(0), correct=(preds == labels.long()).sum())
+    avg = metrics.compute()
+    return avg["loss"], avg["correct"]
 
 
 @torch.no_grad()
 def evaluate(model, loader, device):
     model.eval()
-    total_loss, correct, total = 0.0, 0, 0
+    metrics = RunningMetrics(device)
     for seqs, labels, lengths in loader:
         seqs, labels, lengths = seqs.to(device), labels.to(device), lengths.to(device)
         logits = model(seqs, lengths)
-        loss = nn.functional.binary_cross_entropy_with_logits(logits, labels)
-        total_loss += loss.item() * seqs.size(0)
+        loss = nn.functional.binary_cross_entropy_with_logits(logits, labels, reduction="sum")
         preds = (logits > 0).long()
-        correct += (preds == labels.long()).sum().item()
-        total += seqs.size(0)
-    return total_loss / total, correct / total
+        metrics.update(seqs.size(0), loss=loss, correct=(preds == labels.long()).sum())
+    avg = metrics.compute()
+    return avg["loss"], avg["correct"]
 
 
 def save_curves(history: dict) -> None:
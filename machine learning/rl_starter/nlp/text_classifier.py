@@ -12,6 +12,7 @@ from __future__ import annotations
 
 import argparse
 import re
+import sys
 from collections import Counter
 from pathlib import Path
 
@@ -26,6 +27,11 @@ from torch.nn.utils.rnn import pad_sequence
 from torch.utils.data import DataLoader, Dataset
 from tqdm import tqdm
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.metrics import RunningMetrics
+
 OUTPUT_DIR = Path("outputs")
 AG_CLASSES = ["World", "Sports", "Business", "Sci/Tech"]
 
@@ -142,7 +148,7 @@ def get_device(requested: str) -> torch.device:
 
 def train_epoch(model, loader, optimizer, device):
     model.train()
-    total_loss, correct, total = 0.0, 0, 0
+    metrics = RunningMetrics(device)
     for seqs, labels in loader:
         seqs, labels = seqs.to(device), labels.to(device)
         optimizer.zero_grad()
@@ -150,22 +156,20 @@ def train_epoch(model, loader, optimizer, device):
         loss = F.cross_entropy(out, labels)
         loss.backward()
         optimizer.step()
-        total_loss += loss.item() * seqs.size(0)
-        correct += (out.argmax(1) == labels).sum().item()
-        total += seqs.size(0)
-    return total_loss / total, correct / total
+        metrics.update(seqs.size(0), loss=loss * seqs.size(0), correct=(out.argmax(1) == labels).sum())
+    avg = metrics.compute()
+    return avg["loss"], avg["correct"]
 
 
 @torch.no_grad()
 def evaluate(model, loader, device):
     model.eval()
-    correct, total = 0, 0
+    metrics = RunningMetrics(device)
     for seqs, labels in loader:
         seqs, labels = seqs.to(device), labels.to(device)
         out = model(seqs)
-        correct += (out.argmax(1) == labels).sum().item()
-        total += seqs.size(0)
-    return correct / total
+        metrics.update(seqs.size(0), correct=(out.argmax(1) == labels).sum())
+    return metrics.compute()["correct"]
 
 
 def main() -> None:
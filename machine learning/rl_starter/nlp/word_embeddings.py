@@ -13,6 +13,7 @@ from __future__ import annotations
 
 import argparse
 import re
+import sys
 from collections import Counter
 from pathlib import Path
 
@@ -25,6 +26,11 @@ import torch.nn as nn
 from torch.utils.data import DataLoader, Dataset
 from tqdm import tqdm
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.metrics import RunningMetrics
+
 OUTPUT_DIR = Path("outputs")
 
 
@@ -191,15 +197,15 @@ def main() -> None:
     optimizer = torch.optim.Adam(model.parameters(), lr=args.lr)
 
     for epoch in tqdm(range(1, args.epochs + 1), desc="Training"):
-        total_loss = 0.0
+        metrics = RunningMetrics("cpu")
         for center, context in loader:
             neg = sample_negatives(center.size(0), args.neg_samples, vocab.freqs)
             loss = model(center, context, neg)
             optimizer.zero_grad()
             loss.backward()
             optimizer.step()
-            total_loss += loss.item() * center.size(0)
-        avg_loss = total_loss / len(dataset)
+            metrics.update(center.size(0), loss=loss * center.size(0))
+        avg_loss = metrics.compute()["loss"]
         print(f"  Epoch {epoch}  loss={avg_loss:.4f}")
 
     embeddings = get_embeddings(model)
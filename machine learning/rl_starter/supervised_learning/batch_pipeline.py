@@ -0,0 +1,276 @@
+"""
+batch_pipeline.py — Run the ml_pipeline model comparison over many datasets at once.
+
+Every (dataset, model, fold) fit from every CSV is scheduled on one process
+pool sized to a global core budget, with each worker pinned to one BLAS /
+OpenMP thread, so hundreds of small datasets neither re-import the
+scientific stack per file nor oversubscribe the machine.  Each dataset gets
+its own artifact folder and all of them feed one leaderboard.
+
+Usage:
+    python batch_pipeline.py --dir data/customers --target churned --workers 8
+    python batch_pipeline.py --manifest datasets.csv --fast   # columns: path,target
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, get_scorer, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder
+from threadpoolctl import threadpool_limits
+
+from ml_pipeline import (
+    CALIBRATION_METHODS,
+    DEFAULT_CACHE_DIR,
+    OUTPUT_DIR,
+    FoldTransformCache,
+    _make_cv,
+    _timed_fit_and_score,
+    build_preprocessor,
+    get_fast_models,
+    get_models,
+    load_csv,
+    save_comparison_chart,
+    save_confusion_matrix,
+    save_model,
+    with_final_calibration,
+)
+
+
+# ── worker tasks ────────────────────────────────────────────────
+
+
+def _init_worker() -> None:
+    # the pool is the only source of parallelism: one BLAS / OpenMP thread per worker
+    threadpool_limits(1)
+
+
+def _fold_task(model, Xt_train, y_train, Xt_test, y_test, task: str) -> tuple[float, float]:
+    scorer = get_scorer("accuracy" if task == "classification" else "r2")
+    return _timed_fit_and_score(model, Xt_train, y_train, Xt_test, y_test, scorer)
+
+
+def _final_task(ds: dict, results: dict, out_dir: Path, save_models: bool) -> dict:
+    """Refit the best model on the training split, score the test split and write artifacts."""
+    best_name = max(results, key=lambda k: results[k][0])
+    pipe = Pipeline([("pre", clone(ds["preprocessor"])), ("model", clone(ds["models"][best_name]))])
+    with_final_calibration(pipe)
+    start = time.perf_counter()
+    pipe.fit(ds["X_train"], ds["y_train"])
+    fit_s = time.perf_counter() - start
+    y_pred = pipe.predict(ds["X_test"])
+    if ds["task"] == "classification":
+        test_score = accuracy_score(ds["y_test"], y_pred)
+    else:
+        test_score = r2_score(ds["y_test"], y_pred)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tag = str(out_dir.relative_to(OUTPUT_DIR) / ds["name"])
+    save_comparison_chart(results, ds["task"], tag)
+    if ds["task"] == "classification":
+        labels = [str(c) for c in (ds["classes"] if ds["classes"] is not None else np.unique(ds["y_train"]))]
+        save_confusion_matrix(pipe, ds["X_test"], ds["y_test"], labels, tag)
+    if save_models:
+        save_model(pipe, out_dir / f"{ds['name']}.joblib", ds["X_train"].columns.tolist(), ds["task"], ds["classes"])
+    summary = {
+        "id": ds["id"],
+        "dataset": ds["name"],
+        "task": ds["task"],
+        "rows": ds["rows"],
+        "features": ds["X_train"].shape[1],
+        "best_model": best_name,
+        "cv_mean": results[best_name][0],
+        "cv_std": results[best_name][1],
+        "test_score": test_score,
+        "final_fit_s": fit_s,
+    }
+    (out_dir / "results.json").write_text(json.dumps(
+        {"summary": summary, "cv": {n: dict(zip(["mean", "std", "fit_s"], r)) for n, r in results.items()}},
+        indent=2, default=float,
+    ))
+    return summary
+
+
+# ── scheduling ──────────────────────────────────────────────────
+
+
+def read_manifest(args) -> list[tuple[Path, str]]:
+    if args.manifest:
+        manifest = pd.read_csv(args.manifest)
+        base = Path(args.manifest).parent
+        targets = manifest["target"] if "target" in manifest else [args.target] * len(manifest)
+        return [(base / p if not Path(p).is_absolute() else Path(p), t) for p, t in zip(manifest["path"], targets)]
+    return [(p, args.target) for p in sorted(Path(args.dir).glob("*.csv"))]
+
+
+def dataset_ids(paths: list[Path]) -> list[str]:
+    """Unique key per input: its path relative to the inputs' common directory, without the suffix,
+    so ``a/data.csv`` and ``b/data.csv`` stay apart; an input listed twice gets ``~2``, ``~3``, …"""
+    resolved = [Path(p).resolve() for p in paths]
+    root = Path(os.path.commonpath([p.parent for p in resolved])) if resolved else Path()
+    ids, seen = [], {}
+    for p in resolved:
+        key = p.relative_to(root).with_suffix("").as_posix()
+        seen[key] = seen.get(key, 0) + 1
+        ids.append(key if seen[key] == 1 else f"{key}~{seen[key]}")
+    return ids
+
+
+def prepare_dataset(path: Path, target: str, args) -> dict:
+    """Load, split and build the preprocessor for one CSV (runs in the scheduler process)."""
+    df, target, task = load_csv(str(path), target, None if args.no_csv_cache else args.csv_cache)
+    X = df.drop(columns=[target])
+    y = df[target].values
+    classes = None
+    if task == "classification" and y.dtype == object:
+        le = LabelEncoder()
+        y = le.fit_transform(y)
+        classes = le.classes_
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=args.test_size, random_state=args.seed,
+        stratify=y if task == "classification" else None,
+    )
+    preprocessor = build_preprocessor(X_train, max_onehot=args.max_onehot, high_card=args.high_card)
+    models = get_fast_models(task) if args.fast else get_models(task, args.svm_proba)
+    for model in models.values():
+        if "n_jobs" in model.get_params():
+            model.set_params(n_jobs=1)
+    return {
+        "name": path.stem, "task": task, "rows": len(df), "classes": classes, "models": models,
+        "preprocessor": preprocessor, "X_train": X_train, "X_test": X_test, "y_train": y_train, "y_test": y_test,
+    }
+
+
+def run_batch(datasets: list[tuple[Path, str]], args) -> pd.DataFrame:
+    """Stream datasets through one pool, keeping at most ``args.window`` of them in memory."""
+    out_root = OUTPUT_DIR / args.out
+    # keyed by a unique id; path.stem is only the display name and can repeat across directories
+    todo = [(ds_id, path, target) for ds_id, (path, target) in zip(dataset_ids([p for p, _ in datasets]), datasets)]
+    active: dict[str, dict] = {}     # dataset id → state
+    pending: dict = {}               # future → (dataset id, kind, model name)
+    rows: list[dict] = []
+    cv_rows: list[dict] = []
+    start = time.perf_counter()
+
+    def submit_dataset(pool, ds_id: str, path: Path, target: str) -> None:
+        try:
+            ds = prepare_dataset(path, target, args)
+        except (Exception, SystemExit) as exc:
+            rows.append({"id": ds_id, "dataset": path.stem, "error": f"{type(exc).__name__}: {exc}"})
+            print(f"  [{len(rows)}/{len(datasets)}] {ds_id}: failed to load ({exc})")
+            return
+        ds["id"] = ds_id
+        folds = list(_make_cv(ds["task"], ds["y_train"]).split(ds["X_train"], ds["y_train"]))
+        cache = FoldTransformCache(ds["preprocessor"], ds["X_train"], max_bytes=0, y=ds["y_train"])
+        ds["scores"] = {name: [] for name in ds["models"]}
+        ds["seconds"] = {name: [] for name in ds["models"]}
+        ds["remaining"] = len(folds) * len(ds["models"])
+        active[ds_id] = ds
+        y = ds["y_train"]
+        for train_idx, test_idx in folds:
+            Xt_train, Xt_test = cache.get(train_idx, test_idx)
+            for name, model in ds["models"].items():
+                fut = pool.submit(_fold_task, clone(model), Xt_train, y[train_idx], Xt_test, y[test_idx], ds["task"])
+                pending[fut] = (ds_id, "fold", name)
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        while todo or pending:
+            while todo and len(active) < args.window:
+                submit_dataset(pool, *todo.pop(0))
+            if not pending:
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                ds_id, kind, model_name = pending.pop(fut)
+                ds = active[ds_id]
+                try:
+                    result = fut.result()
+                except Exception as exc:
+                    traceback.print_exception(exc)
+                    result = exc
+                if kind == "fold":
+                    ds["remaining"] -= 1
+                    if not isinstance(result, Exception):
+                        ds["scores"][model_name].append(result[0])
+                        ds["seconds"][model_name].append(result[1])
+                    if ds["remaining"] == 0:
+                        results = {
+                            n: (np.mean(s), np.std(s), np.mean(ds["seconds"][n])) for n, s in ds["scores"].items() if s
+                        }
+                        for n, (mean, std, secs) in results.items():
+                            cv_rows.append({"id": ds_id, "dataset": ds["name"], "model": n, "cv_mean": mean, "cv_std": std,
+                                            "fit_s_per_fold": secs})
+                        if not results:
+                            rows.append({"id": ds_id, "dataset": ds["name"], "error": "every model failed"})
+                            del active[ds_id]
+                            continue
+                        final = pool.submit(_final_task, ds, results, out_root / ds_id, args.save_models)
+                        pending[final] = (ds_id, "final", None)
+                else:
+                    del active[ds_id]
+                    if isinstance(result, Exception):
+                        rows.append({"id": ds_id, "dataset": ds["name"],
+                                     "error": f"{type(result).__name__}: {result}"})
+                        continue
+                    rows.append(result)
+                    print(f"  [{len(rows)}/{len(datasets)}] {ds_id}: {result['best_model']} "
+                          f"cv {result['cv_mean']:.4f} test {result['test_score']:.4f} "
+                          f"({time.perf_counter() - start:.0f}s)")
+
+    out_root.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(cv_rows).to_csv(out_root / "cv_scores.csv", index=False)
+    leaderboard = pd.DataFrame(rows)
+    if "test_score" in leaderboard:
+        leaderboard = leaderboard.sort_values(["task", "test_score"], ascending=[True, False], na_position="last")
+    leaderboard.to_csv(out_root / "leaderboard.csv", index=False)
+    print(f"\n  Saved {out_root / 'leaderboard.csv'} and {out_root / 'cv_scores.csv'}")
+    return leaderboard
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batch ML pipeline over many datasets")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--dir", type=str, help="Directory of CSV files")
+    group.add_argument("--manifest", type=str, help="CSV with a 'path' column (and optional 'target')")
+    parser.add_argument("--target", type=str, default="target", help="Target column (when not in the manifest)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Global core budget")
+    parser.add_argument("--window", type=int, default=None,
+                        help="Datasets held in memory at once (default 2 × workers)")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fast", action="store_true", help="Use the --fast model zoo")
+    parser.add_argument("--svm-proba", choices=("platt",) + CALIBRATION_METHODS, default="platt",
+                        help="SVM probability mode (see ml_pipeline.py --svm-proba)")
+    parser.add_argument("--max-onehot", type=int, default=None)
+    parser.add_argument("--high-card", choices=["target", "hash"], default="target")
+    parser.add_argument("--csv-cache", type=Path, default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--no-csv-cache", action="store_true")
+    parser.add_argument("--save-models", action="store_true", help="Save each dataset's refitted best model")
+    parser.add_argument("--out", type=str, default="batch", help="Subdirectory of outputs/ for all artifacts")
+    args = parser.parse_args()
+    args.window = args.window or 2 * args.workers
+
+    datasets = read_manifest(args)
+    print("═" * 55)
+    print(f"  Batch ML Pipeline — {len(datasets)} datasets, {args.workers} workers")
+    print("═" * 55)
+    leaderboard = run_batch(datasets, args)
+    cols = [c for c in ["id", "task", "best_model", "cv_mean", "test_score", "error"] if c in leaderboard]
+    print(f"\n{leaderboard[cols].to_string(index=False)}")
+    print("\nDone ✓")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,17 +7,24 @@ and compares them to voting ensembles and individual models.
 Usage:
     python ensemble_stacking.py --dataset iris
     python ensemble_stacking.py --dataset diabetes
+    python ensemble_stacking.py --dataset wine --pareto
 """
 
 from __future__ import annotations
 
 import argparse
+import itertools
+import pickle
+import sys
+import time
 
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import numpy as np
 from pathlib import Path
+from joblib import Parallel, delayed
+from sklearn.base import clone
 from sklearn.datasets import load_iris, load_wine, load_digits, load_diabetes
 from sklearn.ensemble import (
     GradientBoostingClassifier,
@@ -30,13 +37,32 @@ from sklearn.ensemble import (
     VotingRegressor,
 )
 from sklearn.linear_model import LogisticRegression, Ridge
-from sklearn.model_selection import StratifiedKFold, cross_val_score, train_test_split
+from sklearn.model_selection import (
+    StratifiedKFold,
+    check_cv,
+    cross_val_predict,
+    cross_val_score,
+    train_test_split,
+)
 from sklearn.neighbors import KNeighborsClassifier, KNeighborsRegressor
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.svm import SVC, SVR
 from sklearn.metrics import accuracy_score, r2_score
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.calibration import (
+    METHODS,
+    DecisionCalibratedClassifier,
+    calibrated_proba,
+    cross_fit_calibrated_proba,
+    fit_calibrators,
+)
+from ml_utils.profiling import StageProfiler
+from stacked_inference import BACKENDS, StackedPredictor
+
 DATASETS = {
     "iris": (load_iris, "classification"),
     "wine": (load_wine, "classification"),
@@ -47,11 +73,16 @@ DATASETS = {
 OUTPUT_DIR = Path("outputs")
 
 
-def build_classifiers():
+def build_classifiers(svm_proba: str = "platt"):
+    svm = Pipeline([("scale", StandardScaler()), ("svc", SVC(probability=True, random_state=42))])
+    if svm_proba != "platt":
+        svm = DecisionCalibratedClassifier(
+            Pipeline([("scale", StandardScaler()), ("svc", SVC(random_state=42))]), method=svm_proba
+        )
     base = [
         ("rf", RandomForestClassifier(n_estimators=100, random_state=42)),
         ("gb", GradientBoostingClassifier(n_estimators=100, random_state=42)),
-        ("svm", Pipeline([("scale", StandardScaler()), ("svc", SVC(probability=True, random_state=42))])),
+        ("svm", svm),
         ("knn", Pipeline([("scale", StandardScaler()), ("knn", KNeighborsClassifier())])),
     ]
     stacker = StackingClassifier(
@@ -97,55 +128,236 @@ def build_regressors():
     }
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Ensemble Stacking Comparison")
-    parser.add_argument("--dataset", choices=list(DATASETS.keys()), required=True)
-    parser.add_argument("--seed", type=int, default=42)
-    args = parser.parse_args()
+def _base_outputs(est, X_train, y_train, X_test, stack_cv, is_clf: bool) -> dict[str, np.ndarray]:
+    """Fit one base estimator on an outer-fold train split and collect everything the ensembles need."""
+    if isinstance(est, DecisionCalibratedClassifier):
+        return _calibrated_outputs(est, X_train, y_train, X_test, stack_cv)
+    method = "predict_proba" if is_clf else "predict"
+    est = clone(est).fit(X_train, y_train)
+    out = {"pred": est.predict(X_test)}
+    if is_clf:
+        out["proba"] = est.predict_proba(X_test)
+    out["test_meta"] = out["proba"] if is_clf else out["pred"]
+    out["oof_meta"] = cross_val_predict(clone(est), X_train, y_train, cv=stack_cv, method=method)
+    return out
 
-    loader, task = DATASETS[args.dataset]
-    data = loader()
-    X, y = data.data, data.target
 
-    if task == "classification":
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=args.seed, stratify=y
+def _calibrated_outputs(est, X_train, y_train, X_test, stack_cv) -> dict[str, np.ndarray]:
+    """_base_outputs for a DecisionCalibratedClassifier, fitting its margin classifier once.
+
+    The inner out-of-fold decision scores the stacker needs anyway double as
+    the calibration set, so the calibrated probabilities cost no extra fits.
+    The test probabilities use calibrators fitted on all of those scores; the
+    stacking features of each inner fold use calibrators fitted on the other
+    folds' scores, so no row is calibrated by a map fitted on itself.
+    """
+    splits = list(stack_cv.split(X_train, y_train))
+    inner = clone(est.estimator).fit(X_train, y_train)
+    oof = cross_val_predict(clone(est.estimator), X_train, y_train, cv=splits, method="decision_function")
+    calibrators = None if est.method == "decision" else fit_calibrators(oof, y_train, inner.classes_, est.method)
+    proba = calibrated_proba(inner.decision_function(X_test), est.method, calibrators)
+    return {
+        "pred": inner.predict(X_test),
+        "proba": proba,
+        "test_meta": proba,
+        "oof_meta": cross_fit_calibrated_proba(oof, y_train, inner.classes_, est.method, splits),
+    }
+
+
+def _meta_features(outputs: list[np.ndarray], n_classes: int) -> np.ndarray:
+    # mirrors StackingClassifier/Regressor: drop the redundant column of binary probabilities
+    cols = [o[:, 1:] if o.ndim == 2 and n_classes == 2 else o.reshape(len(o), -1) for o in outputs]
+    return np.hstack(cols)
+
+
+def base_fold_outputs(models: dict, X, y, cv, task: str) -> tuple[list, list[dict]]:
+    """Fit every base estimator of the stacker once per outer fold and cache its outputs.
+
+    Returns the folds and, per fold, ``{base name: _base_outputs(...)}``.
+    """
+    is_clf = task == "classification"
+    stacker = next(m for m in models.values() if isinstance(m, (StackingClassifier, StackingRegressor)))
+    base = dict(stacker.estimators)
+    folds = list(check_cv(cv, y, classifier=is_clf).split(X, y))
+    jobs = [
+        delayed(_base_outputs)(
+            est, X[tr], y[tr], X[te], check_cv(stacker.cv, y[tr], classifier=is_clf), is_clf
         )
-        models = build_classifiers()
-        scoring = "accuracy"
-        cv = StratifiedKFold(5, shuffle=True, random_state=args.seed)
-    else:
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=args.seed
+        for tr, te in folds
+        for est in base.values()
+    ]
+    flat = Parallel(n_jobs=-1)(jobs)
+    return folds, [dict(zip(base, flat[i * len(base):(i + 1) * len(base)])) for i in range(len(folds))]
+
+
+def _ensemble_predict(kind: str, members: list[str], outs: dict, y_train, final_estimator, classes) -> np.ndarray:
+    """Test-fold prediction of an ensemble of ``members`` assembled from cached base outputs."""
+    if kind == "single":
+        return outs[members[0]]["pred"]
+    if kind == "stack":
+        final = clone(final_estimator).fit(
+            _meta_features([outs[k]["oof_meta"] for k in members], len(classes)), y_train
         )
-        models = build_regressors()
-        scoring = "r2"
-        cv = 5
+        return final.predict(_meta_features([outs[k]["test_meta"] for k in members], len(classes)))
+    if kind == "soft":
+        return classes[np.mean([outs[k]["proba"] for k in members], axis=0).argmax(axis=1)]
+    if kind == "hard":
+        votes = np.searchsorted(classes, np.column_stack([outs[k]["pred"] for k in members]))
+        counts = np.apply_along_axis(np.bincount, 1, votes, minlength=len(classes))
+        return classes[counts.argmax(axis=1)]
+    return np.mean([outs[k]["pred"] for k in members], axis=0)  # "vote" (regression)
 
-    print("═" * 55)
-    print(f"  Ensemble Comparison — {args.dataset} ({task})")
-    print("═" * 55)
 
-    results = {}
-    for name, model in models.items():
-        scores = cross_val_score(model, X_train, y_train, cv=cv, scoring=scoring, n_jobs=-1)
-        results[name] = (scores.mean(), scores.std())
-        marker = "  ★" if "Stacking" in name else ""
-        print(f"  {name:<28s} {scores.mean():.4f} ± {scores.std():.4f}{marker}")
+def _ensemble_kind(model) -> str:
+    if isinstance(model, (StackingClassifier, StackingRegressor)):
+        return "stack"
+    if isinstance(model, VotingClassifier):
+        return model.voting
+    if isinstance(model, VotingRegressor):
+        return "vote"
+    return "single"
 
-    # fit best ensemble on full train, evaluate on test
-    best_name = max(results, key=lambda k: results[k][0])
-    best_model = models[best_name]
-    best_model.fit(X_train, y_train)
-    y_pred = best_model.predict(X_test)
 
-    print(f"\nBest: {best_name}")
-    if task == "classification":
-        print(f"  Test accuracy: {accuracy_score(y_test, y_pred):.4f}")
-    else:
-        print(f"  Test R²: {r2_score(y_test, y_pred):.4f}")
+def oof_ensemble_scores(models: dict, X, y, cv, task: str, fold_outputs=None) -> dict[str, np.ndarray]:
+    """Per-fold scores of every base model and ensemble, fitting each base model once per fold.
+
+    Each base estimator is fitted on the outer training split and its
+    test-fold predictions, probabilities and inner out-of-fold stacking
+    features are cached.  The stacking and voting ensembles in ``models`` are
+    then assembled from that cache instead of retraining their members.
+    """
+    metric = accuracy_score if task == "classification" else r2_score
+    stacker = next(m for m in models.values() if isinstance(m, (StackingClassifier, StackingRegressor)))
+    base = dict(stacker.estimators)
+    folds, cache = fold_outputs or base_fold_outputs(models, X, y, cv, task)
+    classes = np.unique(y)
+
+    scores: dict[str, list[float]] = {name: [] for name in models}
+    for (tr, te), outs in zip(folds, cache):
+        for name, model in models.items():
+            kind = _ensemble_kind(model)
+            members = list(base) if kind != "single" else [next(k for k, est in base.items() if est is model)]
+            pred = _ensemble_predict(kind, members, outs, y[tr], stacker.final_estimator, classes)
+            scores[name].append(metric(y[te], pred))
+    return {name: np.asarray(s) for name, s in scores.items()}
+
+
+# ── latency-budgeted selection ──────────────────────────────────
+
+
+def measure_latency(model, X, n_rows: int = 200, proba: bool = False) -> tuple[float, float]:
+    """p50 and p99 milliseconds of single-row ``predict`` (or ``predict_proba``) calls."""
+    predict = model.predict_proba if proba else model.predict
+    predict(X[:1])  # warm-up
+    times = np.empty(n_rows)
+    for i in range(n_rows):
+        row = X[i % len(X)][None, :]
+        start = time.perf_counter()
+        predict(row)
+        times[i] = time.perf_counter() - start
+    return float(np.percentile(times, 50) * 1e3), float(np.percentile(times, 99) * 1e3)
+
+
+def model_footprint(model) -> int:
+    """Serialised size in bytes, a proxy for the memory a served model holds."""
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
 
-    # plot
+
+def build_ensemble(kind: str, members: list[str], models: dict):
+    """Unfitted estimator for ``kind`` over the named base estimators (sequential, n_jobs=None)."""
+    stacker = next(m for m in models.values() if isinstance(m, (StackingClassifier, StackingRegressor)))
+    base = dict(stacker.estimators)
+    estimators = [(k, clone(base[k])) for k in members]
+    if kind == "single":
+        return estimators[0][1]
+    if kind == "stack":
+        return clone(stacker).set_params(estimators=estimators, n_jobs=None)
+    if kind == "vote":
+        return VotingRegressor(estimators=estimators)
+    return VotingClassifier(estimators=estimators, voting=kind)
+
+
+def latency_search(models: dict, fold_outputs, X_train, y_train, task: str, n_rows: int = 200, cv=None) -> list[dict]:
+    """Score every (ensemble kind, subset of base estimators) and estimate its serving cost.
+
+    Scores come from the cached base-model fold outputs, so no ensemble is
+    refitted.  Each base estimator is fitted once on the full training set to
+    measure its single-row p99 latency and footprint; an ensemble's latency
+    is estimated as the sum over its members (they run sequentially) plus
+    the meta-learner.  ``fold_outputs`` of ``None`` computes them on ``cv``.
+    """
+    is_clf = task == "classification"
+    metric = accuracy_score if is_clf else r2_score
+    stacker = next(m for m in models.values() if isinstance(m, (StackingClassifier, StackingRegressor)))
+    base = dict(stacker.estimators)
+    folds, cache = fold_outputs or base_fold_outputs(models, X_train, y_train, cv, task)
+    classes = np.unique(y_train)
+
+    cost = {}
+    for name, est in base.items():
+        fitted = clone(est).fit(X_train, y_train)
+        _, p99 = measure_latency(fitted, X_train, n_rows, proba=is_clf)
+        cost[name] = (p99, model_footprint(fitted))
+    tr0 = folds[0][0]
+    meta_X = _meta_features([cache[0][k]["oof_meta"] for k in base], len(classes))
+    meta = clone(stacker.final_estimator).fit(meta_X, y_train[tr0])
+    meta_p99 = measure_latency(meta, meta_X, n_rows)[1]
+
+    kinds = ["stack", "soft", "hard"] if is_clf else ["stack", "vote"]
+    candidates = []
+    for size in range(1, len(base) + 1):
+        for members in itertools.combinations(base, size):
+            for kind in (["single"] if size == 1 else kinds):
+                scores = [
+                    metric(y_train[te], _ensemble_predict(kind, list(members), outs, y_train[tr],
+                                                          stacker.final_estimator, classes))
+                    for (tr, te), outs in zip(folds, cache)
+                ]
+                p99 = sum(cost[k][0] for k in members) + (meta_p99 if kind == "stack" else 0.0)
+                candidates.append({
+                    "name": members[0] if kind == "single" else f"{kind}[{'+'.join(members)}]",
+                    "kind": kind,
+                    "members": list(members),
+                    "score": float(np.mean(scores)),
+                    "std": float(np.std(scores)),
+                    "p99_ms": p99,
+                    "bytes": sum(cost[k][1] for k in members),
+                })
+    return candidates
+
+
+def pareto_front(candidates: list[dict]) -> list[dict]:
+    """Candidates not beaten on both score and p99 latency, fastest first."""
+    front, best = [], -np.inf
+    for c in sorted(candidates, key=lambda c: (c["p99_ms"], -c["score"])):
+        if c["score"] > best:
+            front.append(c)
+            best = c["score"]
+    return front
+
+
+def save_pareto_chart(candidates: list[dict], front: list[dict], task: str, tag: str,
+                      budget_ms: float | None = None) -> None:
+    OUTPUT_DIR.mkdir(exist_ok=True)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.scatter([c["p99_ms"] for c in candidates], [c["score"] for c in candidates], color="#b0b0b0", s=20)
+    ax.plot([c["p99_ms"] for c in front], [c["score"] for c in front], "o-", color="#2bb0a7", label="Pareto front")
+    for c in front:
+        ax.annotate(c["name"], (c["p99_ms"], c["score"]), textcoords="offset points", xytext=(5, -10), fontsize=8)
+    if budget_ms is not None:
+        ax.axvline(budget_ms, color="#f2b14c", linestyle="--", label=f"budget {budget_ms:g} ms")
+    ax.set_xscale("log")
+    ax.set_xlabel("estimated single-row p99 latency (ms)")
+    ax.set_ylabel("Accuracy" if task == "classification" else "R²")
+    ax.set_title(f"Score vs latency ({tag})")
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(OUTPUT_DIR / f"{tag}_pareto.png", dpi=150)
+    plt.close(fig)
+    print(f"  Saved {OUTPUT_DIR / f'{tag}_pareto.png'}")
+
+
+def save_ensemble_chart(results: dict[str, tuple[float, float]], task: str, tag: str) -> None:
     OUTPUT_DIR.mkdir(exist_ok=True)
     names = list(results.keys())
     means = [results[n][0] for n in names]
@@ -156,7 +368,7 @@ def main() -> None:
     ax.barh(names, means, xerr=stds, color=colors, capsize=4)
     metric = "Accuracy" if task == "classification" else "R²"
     ax.set_xlabel(metric)
-    ax.set_title(f"Individual vs Ensemble ({args.dataset})")
+    ax.set_title(f"Individual vs Ensemble ({tag})")
     ax.legend(
         handles=[
             plt.Rectangle((0, 0), 1, 1, fc="#2bb0a7", label="Individual"),
@@ -165,9 +377,122 @@ def main() -> None:
         labels=["Individual", "Ensemble"],
     )
     fig.tight_layout()
-    fig.savefig(OUTPUT_DIR / f"{args.dataset}_ensemble.png", dpi=150)
+    fig.savefig(OUTPUT_DIR / f"{tag}_ensemble.png", dpi=150)
     plt.close(fig)
-    print(f"\n  Saved {OUTPUT_DIR / f'{args.dataset}_ensemble.png'}")
+    print(f"\n  Saved {OUTPUT_DIR / f'{tag}_ensemble.png'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ensemble Stacking Comparison")
+    parser.add_argument("--dataset", choices=list(DATASETS.keys()), required=True)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--refit-ensembles", action="store_true",
+                        help="Cross-validate each ensemble independently instead of reusing base-model predictions")
+    parser.add_argument("--latency-budget-ms", type=float, default=None,
+                        help="Pick the best base-estimator subset / ensemble whose single-row p99 fits this budget")
+    parser.add_argument("--latency-rows", type=int, default=200, help="Single-row predictions timed per model")
+    parser.add_argument("--pareto", action="store_true",
+                        help="Report the score-vs-latency Pareto front of every base-estimator subset "
+                             "(implied by --latency-budget-ms)")
+    parser.add_argument("--parallel-predict", choices=BACKENDS, default=None,
+                        help="Score the test set of a stacking winner with the block-parallel StackedPredictor")
+    parser.add_argument("--svm-proba", choices=("platt",) + METHODS, default="platt",
+                        help="SVM probabilities: libsvm Platt (probability=True), calibration on held-out "
+                             "decision scores (sigmoid / isotonic) or a softmax of decision scores")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-stage wall/CPU/peak RSS and per-model latency to outputs/<dataset>_ensemble_profile.*")
+    args = parser.parse_args()
+    prof = StageProfiler(enabled=args.profile)
+
+    with prof.stage("load"):
+        loader, task = DATASETS[args.dataset]
+        data = loader()
+        X, y = data.data, data.target
+
+    with prof.stage("split"):
+        if task == "classification":
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=0.2, random_state=args.seed, stratify=y
+            )
+            models = build_classifiers(args.svm_proba)
+            scoring = "accuracy"
+            cv = StratifiedKFold(5, shuffle=True, random_state=args.seed)
+        else:
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=0.2, random_state=args.seed
+            )
+            models = build_regressors()
+            scoring = "r2"
+            cv = 5
+
+    print("═" * 55)
+    print(f"  Ensemble Comparison — {args.dataset} ({task})")
+    print("═" * 55)
+
+    results = {}
+    oof_scores = fold_outputs = None
+    search = args.pareto or args.latency_budget_ms is not None
+    if not args.refit_ensembles:
+        with prof.stage("cv (shared base-model folds)"):
+            fold_outputs = base_fold_outputs(models, X_train, y_train, cv, task)
+            oof_scores = oof_ensemble_scores(models, X_train, y_train, cv, task, fold_outputs)
+    for name, model in models.items():
+        if oof_scores is not None:
+            scores = oof_scores[name]
+        else:
+            with prof.stage(f"cv: {name}"):
+                scores = cross_val_score(model, X_train, y_train, cv=cv, scoring=scoring, n_jobs=-1)
+        prof.time_model(name, clone(model), X_train, y_train, X_test)
+        results[name] = (scores.mean(), scores.std())
+        marker = "  ★" if "Stacking" in name else ""
+        print(f"  {name:<28s} {scores.mean():.4f} ± {scores.std():.4f}{marker}")
+
+    candidates = front = None
+    if search:
+        with prof.stage("latency + subset search"):
+            candidates = latency_search(models, fold_outputs, X_train, y_train, task, args.latency_rows, cv)
+        front = pareto_front(candidates)
+        print(f"\nPareto front (CV score vs estimated single-row p99, {len(candidates)} candidates):")
+        for c in front:
+            print(f"  {c['name']:<28s} {c['score']:.4f}  p99 {c['p99_ms']:8.2f} ms  {c['bytes'] / 2**20:7.2f} MB")
+
+    # fit best ensemble on full train, evaluate on test
+    best_name = max(results, key=lambda k: results[k][0])
+    best_model = models[best_name]
+    if args.latency_budget_ms is not None:
+        within = [c for c in candidates if c["p99_ms"] <= args.latency_budget_ms]
+        if within:
+            pick = max(within, key=lambda c: c["score"])
+            best_name, best_model = pick["name"], build_ensemble(pick["kind"], pick["members"], models)
+            print(f"\nWithin {args.latency_budget_ms:g} ms: {best_name} "
+                  f"(CV {pick['score']:.4f}, est. p99 {pick['p99_ms']:.2f} ms)")
+        else:
+            print(f"\nNo candidate fits {args.latency_budget_ms:g} ms; keeping {best_name}")
+    with prof.stage("fit best"):
+        best_model.fit(X_train, y_train)
+    with prof.stage("test predict"):
+        if args.parallel_predict and isinstance(best_model, (StackingClassifier, StackingRegressor)):
+            y_pred = StackedPredictor(best_model, backend=args.parallel_predict).predict(X_test)
+        else:
+            y_pred = best_model.predict(X_test)
+
+    print(f"\nBest: {best_name}")
+    if args.latency_budget_ms is not None:
+        p50, p99 = measure_latency(best_model, X_test, args.latency_rows, proba=hasattr(best_model, "predict_proba")
+                                   and task == "classification")
+        print(f"  Measured single-row latency: p50 {p50:.2f} ms, p99 {p99:.2f} ms, "
+              f"footprint {model_footprint(best_model) / 2**20:.2f} MB")
+    if task == "classification":
+        print(f"  Test accuracy: {accuracy_score(y_test, y_pred):.4f}")
+    else:
+        print(f"  Test R²: {r2_score(y_test, y_pred):.4f}")
+
+    with prof.stage("save plot"):
+        save_ensemble_chart(results, task, args.dataset)
+        if search:
+            save_pareto_chart(candidates, front, task, args.dataset, args.latency_budget_ms)
+    prof.report(OUTPUT_DIR / f"{args.dataset}_ensemble_profile",
+                {"script": "ensemble_stacking", "dataset": args.dataset, "task": task, "rows": len(X)})
     print("Done ✓")
 
 
@@ -13,7 +13,13 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import math
+import os
 import sys
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
 
 import matplotlib
@@ -22,6 +28,10 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
+import joblib
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin, clone, is_classifier
 from sklearn.compose import ColumnTransformer
 from sklearn.datasets import (
     load_digits,
@@ -32,30 +42,46 @@ from sklearn.datasets import (
 from sklearn.ensemble import (
     GradientBoostingClassifier,
     GradientBoostingRegressor,
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
     RandomForestClassifier,
     RandomForestRegressor,
 )
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
 from sklearn.impute import SimpleImputer
-from sklearn.linear_model import LogisticRegression, Ridge
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import LogisticRegression, Ridge, SGDClassifier, SGDRegressor
 from sklearn.metrics import (
     ConfusionMatrixDisplay,
     RocCurveDisplay,
     accuracy_score,
     classification_report,
+    get_scorer,
     mean_absolute_error,
     mean_squared_error,
     r2_score,
 )
 from sklearn.model_selection import (
     GridSearchCV,
+    HalvingGridSearchCV,
+    ParameterGrid,
     StratifiedKFold,
-    cross_val_score,
+    check_cv,
+    cross_validate,
     train_test_split,
 )
+from sklearn.naive_bayes import GaussianNB, MultinomialNB
 from sklearn.neighbors import KNeighborsClassifier, KNeighborsRegressor
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import LabelEncoder, OneHotEncoder, StandardScaler
-from sklearn.svm import SVC, SVR
+from sklearn.neural_network import MLPClassifier, MLPRegressor
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import (
+    LabelEncoder,
+    MinMaxScaler,
+    OneHotEncoder,
+    StandardScaler,
+    TargetEncoder,
+)
+from sklearn.svm import SVC, SVR, LinearSVC, LinearSVR
 from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
 
 try:
@@ -64,6 +90,14 @@ try:
 except ImportError:
     HAS_XGB = False
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.calibration import METHODS as CALIBRATION_METHODS, DecisionCalibratedClassifier
+from ml_utils.dataset_cache import DEFAULT_CACHE_DIR, cached_read_csv
+from ml_utils.profiling import StageProfiler
+from ml_utils.result_cache import DEFAULT_RESULT_DIR, ResultCache, estimator_key
+
 BUILTIN_DATASETS = {
     "iris": (load_iris, "classification"),
     "wine": (load_wine, "classification"),
@@ -85,8 +119,8 @@ def load_builtin(name: str) -> tuple[pd.DataFrame, str, str]:
     return df, "target", task
 
 
-def load_csv(path: str, target: str) -> tuple[pd.DataFrame, str, str]:
-    df = pd.read_csv(path)
+def load_csv(path: str, target: str, cache_dir: Path | None = None) -> tuple[pd.DataFrame, str, str]:
+    df = cached_read_csv(path, cache_dir)
     if target not in df.columns:
         sys.exit(f"Target column '{target}' not found. Columns: {list(df.columns)}")
     nunique = df[target].nunique()
@@ -94,12 +128,215 @@ def load_csv(path: str, target: str) -> tuple[pd.DataFrame, str, str]:
     return df, target, task
 
 
+def infer_compact_dtypes(
+    path: str, target: str, sample_rows: int = 10_000, max_categories: int = 1000
+) -> dict[str, str]:
+    """Pick compact read dtypes for the feature columns from a sample of the file.
+
+    Floats become float32 and low-cardinality text becomes category.  Integer
+    columns are left to pandas and downcast per chunk, since a sample cannot
+    prove the range (or the absence of NaNs) for the rest of the file.  The
+    target keeps its full precision.
+    """
+    sample = pd.read_csv(path, nrows=sample_rows)
+    dtypes: dict[str, str] = {}
+    for col in sample.columns:
+        s = sample[col]
+        if col == target:
+            continue
+        if pd.api.types.is_float_dtype(s):
+            dtypes[col] = "float32"
+        elif not pd.api.types.is_numeric_dtype(s) and s.nunique() <= max_categories:
+            dtypes[col] = "category"
+    return dtypes
+
+
+def iter_csv_chunks(
+    path: str, target: str, chunksize: int, dtypes: dict[str, str] | None = None
+) -> Iterator[tuple[pd.DataFrame, np.ndarray]]:
+    """Stream (X, y) chunks with compact dtypes; suitable for ``partial_fit`` loops.
+
+    ``dtypes`` are applied per chunk rather than by the parser, so a column
+    that stops fitting its sampled dtype (text further down a float column)
+    does not fail the read: it is switched to ``"str"`` in ``dtypes``, and
+    every later pass parses it as text, as a plain ``read_csv`` would.
+    """
+    dtypes = {} if dtypes is None else dtypes
+    text = {col: str for col, dtype in dtypes.items() if dtype == "str"}
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype=text):
+        if target not in chunk.columns:
+            sys.exit(f"Target column '{target}' not found. Columns: {list(chunk.columns)}")
+        for col, dtype in list(dtypes.items()):
+            if dtype == "str":
+                continue
+            try:
+                chunk[col] = chunk[col].astype(dtype)
+            except (ValueError, TypeError):
+                print(f"  Column '{col}' does not fit the sampled {dtype}; reading it as text")
+                dtypes[col] = "str"
+        for col in chunk.select_dtypes(include=["integer"]).columns:
+            if col != target:
+                chunk[col] = pd.to_numeric(chunk[col], downcast="integer")
+        yield chunk.drop(columns=[target]), chunk[target].to_numpy()
+
+
+class ColumnStats:
+    """Row count, nulls, mean/std/min/max and target cardinality, accumulated per chunk."""
+
+    def __init__(self, max_target_levels: int = 20):
+        self.max_target_levels = max_target_levels
+        self.n_rows = 0
+        self.nulls: dict[str, int] = {}
+        self.sum: dict[str, float] = {}
+        self.sumsq: dict[str, float] = {}
+        self.min: dict[str, float] = {}
+        self.max: dict[str, float] = {}
+        self.target_levels: set = set()
+        self.target_numeric = True
+
+    def update(self, X: pd.DataFrame, y: np.ndarray) -> None:
+        self.n_rows += len(X)
+        for col, n in X.isna().sum().items():
+            self.nulls[col] = self.nulls.get(col, 0) + int(n)
+        for col in X.select_dtypes(include=["number"]).columns:
+            v = X[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            self.sum[col] = self.sum.get(col, 0.0) + np.nansum(v)
+            self.sumsq[col] = self.sumsq.get(col, 0.0) + np.nansum(v * v)
+            self.min[col] = min(self.min.get(col, np.inf), np.nanmin(v, initial=np.inf))
+            self.max[col] = max(self.max.get(col, -np.inf), np.nanmax(v, initial=-np.inf))
+        self.target_numeric &= pd.api.types.is_numeric_dtype(y)
+        # a numeric target only needs enough levels to tell classification from regression;
+        # any other target is a class label, and partial_fit needs every one of them
+        if not self.target_numeric or len(self.target_levels) <= self.max_target_levels:
+            self.target_levels.update(pd.unique(y[~pd.isna(y)]).tolist())
+
+    @property
+    def task(self) -> str:
+        few_levels = len(self.target_levels) <= self.max_target_levels
+        return "classification" if few_levels or not self.target_numeric else "regression"
+
+    def summary(self) -> pd.DataFrame:
+        rows = {}
+        for col, nulls in self.nulls.items():
+            row = {"nulls": nulls}
+            if col in self.sum:
+                n = self.n_rows - nulls
+                mean = self.sum[col] / max(n, 1)
+                row.update(mean=mean, std=np.sqrt(max(self.sumsq[col] / max(n, 1) - mean**2, 0.0)),
+                           min=self.min[col], max=self.max[col])
+            rows[col] = row
+        return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def load_csv_chunked(
+    path: str, target: str, chunksize: int
+) -> tuple[pd.DataFrame, str, str, ColumnStats]:
+    """Chunked, compact-dtype variant of :func:`load_csv` that also returns column stats.
+
+    Two passes over the file: the first accumulates the stats, the row count,
+    each column's widest chunk dtype and every category (and settles any
+    sampled dtype that does not hold for the whole file); the second fills
+    preallocated column arrays chunk by chunk.  Peak memory is the compact
+    frame plus one chunk, never a list of chunks plus their concatenation.
+    The frame itself is still in memory — only the ``--streaming`` path
+    (:func:`iter_csv_chunks` / :func:`fit_streaming`) is out-of-core.
+    """
+    dtypes = infer_compact_dtypes(path, target)
+    stats = ColumnStats()
+    col_dtypes: dict[str, np.dtype] = {}
+    categories: dict[str, dict] = {}
+    for X_chunk, y_chunk in iter_csv_chunks(path, target, chunksize, dtypes):
+        stats.update(X_chunk, y_chunk)
+        for col, values in X_chunk.items():
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                categories.setdefault(col, {}).update(dict.fromkeys(values.cat.categories))
+            else:
+                col_dtypes[col] = np.result_type(col_dtypes.get(col, values.dtype), values.dtype)
+        col_dtypes[target] = np.result_type(col_dtypes.get(target, y_chunk.dtype), y_chunk.dtype)
+    # a column that fell back mid-file has categorical chunks and plain ones: keep it plain
+    if stats.n_rows == 0:
+        raise ValueError(f"{path} has no data rows")
+    for col in set(categories) & set(col_dtypes):
+        col_dtypes[col] = np.dtype(object)
+        del categories[col]
+    cat_dtypes = {col: pd.CategoricalDtype(list(cats)) for col, cats in categories.items()}
+
+    n = stats.n_rows
+    arrays = {col: np.empty(n, dtype=dtype) for col, dtype in col_dtypes.items() if col != target}
+    codes = {col: np.empty(n, dtype=np.int32) for col in cat_dtypes}
+    y = np.empty(n, dtype=col_dtypes[target])
+    start = 0
+    for X_chunk, y_chunk in iter_csv_chunks(path, target, chunksize, dtypes):
+        stop = start + len(X_chunk)
+        for col, values in X_chunk.items():
+            if col in codes:
+                codes[col][start:stop] = values.astype(cat_dtypes[col]).cat.codes
+            else:
+                arrays[col][start:stop] = values.to_numpy()
+        y[start:stop] = y_chunk
+        start = stop
+
+    columns = {
+        col: pd.Categorical.from_codes(codes[col], dtype=cat_dtypes[col]) if col in codes else arrays[col]
+        for col in X_chunk.columns
+    }
+    columns[target] = y
+    # copy=False keeps each column array as is instead of consolidating them into 2-D blocks
+    return pd.DataFrame(columns, copy=False), target, stats.task, stats
+
+
 # ── preprocessing ───────────────────────────────────────────────
 
 
-def build_preprocessor(X: pd.DataFrame) -> ColumnTransformer:
+class HashingEncoder(TransformerMixin, BaseEstimator):
+    """Hash categorical columns into one fixed-width sparse block (one bucket hit per cell).
+
+    Vectorised with ``pd.util.hash_array``; each column is hashed with its
+    own 16-byte key, so equal strings in different columns land in
+    independent buckets.
+    """
+
+    def __init__(self, n_features: int = 2**10):
+        self.n_features = n_features
+
+    def fit(self, X, y=None):
+        self.n_features_in_ = np.asarray(X).shape[1]
+        return self
+
+    def transform(self, X) -> sparse.csr_matrix:
+        X = np.asarray(X)
+        n_rows, n_cols = X.shape
+        cols = np.empty((n_rows, n_cols), dtype=np.uint64)
+        for j in range(n_cols):
+            cols[:, j] = pd.util.hash_array(X[:, j].astype(str).astype(object), hash_key=f"column{j:010d}")
+        rows = np.repeat(np.arange(n_rows), n_cols)
+        data = np.ones(n_rows * n_cols)
+        buckets = (cols.ravel() % np.uint64(self.n_features)).astype(np.int64)
+        return sparse.csr_matrix((data, (rows, buckets)), shape=(n_rows, self.n_features))
+
+    def get_feature_names_out(self, input_features=None) -> np.ndarray:
+        return np.array([f"hash_{i}" for i in range(self.n_features)], dtype=object)
+
+
+def build_preprocessor(
+    X: pd.DataFrame,
+    sparse_output: bool = False,
+    max_onehot: int | None = None,
+    high_card: str = "target",
+    hash_features: int = 2**10,
+) -> ColumnTransformer:
+    """Impute + scale numeric columns and encode categoricals.
+
+    By default every categorical is one-hot encoded into a dense matrix.
+    With ``max_onehot`` set, columns with more levels than that are instead
+    target-encoded (``high_card="target"``, cross-fitted so training rows
+    get out-of-fold encodings) or feature-hashed (``"hash"``).
+    ``sparse_output`` keeps one-hot/hashed blocks as CSR end to end.
+    """
     num_cols = X.select_dtypes(include=["number"]).columns.tolist()
     cat_cols = X.select_dtypes(exclude=["number"]).columns.tolist()
+    high_cols = [c for c in cat_cols if max_onehot is not None and X[c].nunique() > max_onehot]
+    low_cols = [c for c in cat_cols if c not in high_cols]
     transformers = []
     if num_cols:
         transformers.append((
@@ -107,28 +344,135 @@ def build_preprocessor(X: pd.DataFrame) -> ColumnTransformer:
             Pipeline([("impute", SimpleImputer(strategy="median")), ("scale", StandardScaler())]),
             num_cols,
         ))
-    if cat_cols:
+    if low_cols:
         transformers.append((
             "cat",
             Pipeline([
                 ("impute", SimpleImputer(strategy="most_frequent")),
-                ("encode", OneHotEncoder(handle_unknown="ignore", sparse_output=False)),
+                ("encode", OneHotEncoder(handle_unknown="ignore", sparse_output=sparse_output)),
             ]),
-            cat_cols,
+            low_cols,
+        ))
+    if high_cols:
+        encoder = (
+            HashingEncoder(hash_features) if high_card == "hash"
+            else TargetEncoder(random_state=42)
+        )
+        transformers.append((
+            f"{high_card}_enc",
+            Pipeline([("impute", SimpleImputer(strategy="most_frequent")), ("encode", encoder)]),
+            high_cols,
         ))
-    return ColumnTransformer(transformers, remainder="passthrough")
+    return ColumnTransformer(
+        transformers, remainder="passthrough", sparse_threshold=1.0 if sparse_output else 0.3
+    )
+
+
+# ── transform cache ─────────────────────────────────────────────
+
+
+def _nbytes(a) -> int:
+    if sparse.issparse(a):
+        return a.data.nbytes + a.indices.nbytes + a.indptr.nbytes
+    return np.asarray(a).nbytes
+
+
+class FoldTransformCache:
+    """LRU cache of preprocessed (train, test) matrices, one entry per CV fold.
+
+    The preprocessor is fitted once per fold on that fold's training rows and
+    the transformed matrices are shared by every model and grid candidate.
+    Entries are evicted least-recently-used once ``max_bytes`` is exceeded.
+    """
+
+    def __init__(
+        self, preprocessor: ColumnTransformer, X: pd.DataFrame, max_bytes: int = 512 * 2**20, y=None
+    ):
+        self.preprocessor = preprocessor
+        self.X = X
+        self.y = y  # needed by supervised encoders (TargetEncoder)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+        self._size = 0
+
+    @staticmethod
+    def key(train_idx: np.ndarray, test_idx: np.ndarray) -> tuple:
+        return (len(train_idx), hash(train_idx.tobytes()), hash(test_idx.tobytes()))
+
+    def get(self, train_idx: np.ndarray, test_idx: np.ndarray) -> tuple:
+        key = self.key(train_idx, test_idx)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][:2]
+        self.misses += 1
+        pre = clone(self.preprocessor)
+        Xt_train = pre.fit_transform(self.X.iloc[train_idx], None if self.y is None else self.y[train_idx])
+        Xt_test = pre.transform(self.X.iloc[test_idx])
+        size = _nbytes(Xt_train) + _nbytes(Xt_test)
+        self._entries[key] = (Xt_train, Xt_test, size)
+        self._size += size
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._size -= evicted
+        return Xt_train, Xt_test
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses, {self._size / 2**20:.1f} MB held"
 
 
 # ── models ──────────────────────────────────────────────────────
 
 
-def get_models(task: str) -> dict[str, object]:
+def get_fast_models(task: str, sparse_input: bool = False) -> dict[str, object]:
+    """Cheaper stand-ins for the slow models: early-stopped histogram boosting,
+    linear / Nyström-approximated SVMs and KD-tree KNN."""
+    # HistGradientBoosting needs dense input and KD-trees fall back to brute force on CSR
+    knn_algorithm = "auto" if sparse_input else "kd_tree"
+    boosting = {"max_iter": 500, "early_stopping": True, "validation_fraction": 0.1,
+                "n_iter_no_change": 10, "random_state": 42}
+    if task == "classification":
+        models = {
+            "Logistic Regression": LogisticRegression(max_iter=2000, random_state=42),
+            "Random Forest": RandomForestClassifier(n_estimators=200, random_state=42),
+            "Hist Gradient Boosting": HistGradientBoostingClassifier(**boosting),
+            "Linear SVM": LinearSVC(random_state=42),
+            "SVM (Nystroem)": make_pipeline(Nystroem(n_components=300, random_state=42), LinearSVC(random_state=42)),
+            "KNN (KD-tree)": KNeighborsClassifier(algorithm=knn_algorithm),
+            "Decision Tree": DecisionTreeClassifier(random_state=42),
+        }
+    else:
+        models = {
+            "Ridge Regression": Ridge(),
+            "Random Forest": RandomForestRegressor(n_estimators=200, random_state=42),
+            "Hist Gradient Boosting": HistGradientBoostingRegressor(**boosting),
+            "Linear SVR": LinearSVR(random_state=42, max_iter=5000),
+            "SVR (Nystroem)": make_pipeline(
+                Nystroem(n_components=300, random_state=42), LinearSVR(random_state=42, max_iter=5000)
+            ),
+            "KNN (KD-tree)": KNeighborsRegressor(algorithm=knn_algorithm),
+            "Decision Tree": DecisionTreeRegressor(random_state=42),
+        }
+    if sparse_input:
+        del models["Hist Gradient Boosting"]
+    return models
+
+
+def get_models(task: str, svm_proba: str = "platt") -> dict[str, object]:
+    """Default model zoo; ``svm_proba`` other than ``"platt"`` swaps ``SVC(probability=True)``
+    for a single SVC fit, scored uncalibrated in CV and tuning and calibrated on out-of-fold
+    decision scores only in the final refit (see ``with_final_calibration``)."""
     if task == "classification":
+        svm = SVC(probability=True, random_state=42)
+        if svm_proba != "platt":
+            svm = DecisionCalibratedClassifier(SVC(random_state=42), method=svm_proba, calibrate=False)
         models = {
             "Logistic Regression": LogisticRegression(max_iter=2000, random_state=42),
             "Random Forest": RandomForestClassifier(n_estimators=200, random_state=42),
             "Gradient Boosting": GradientBoostingClassifier(n_estimators=200, random_state=42),
-            "SVM (RBF)": SVC(probability=True, random_state=42),
+            "SVM (RBF)": svm,
             "KNN": KNeighborsClassifier(),
             "Decision Tree": DecisionTreeClassifier(random_state=42),
         }
@@ -152,43 +496,364 @@ def get_models(task: str) -> dict[str, object]:
 
 PARAM_GRIDS: dict[str, dict] = {
     "SVM (RBF)": {"model__C": [0.1, 1, 10, 100], "model__gamma": ["scale", "auto"]},
-    "Random Forest": {"model__n_estimators": [100, 300], "model__max_depth": [None, 10, 20]},
+    # n_estimators checkpoints are scored from one warm-started fit (see WARM_START_PARAMS)
+    "Random Forest": {"model__n_estimators": [100, 200, 300], "model__max_depth": [None, 10, 20]},
     "Gradient Boosting": {
-        "model__n_estimators": [100, 300],
+        "model__n_estimators": [100, 200, 300],
         "model__learning_rate": [0.05, 0.1, 0.2],
         "model__max_depth": [3, 5],
     },
     "SVR (RBF)": {"model__C": [0.1, 1, 10, 100], "model__gamma": ["scale", "auto"]},
     "Ridge Regression": {"model__alpha": [0.01, 0.1, 1, 10, 100]},
+    "Hist Gradient Boosting": {"model__learning_rate": [0.05, 0.1, 0.2], "model__max_leaf_nodes": [15, 31, 63]},
+    "Linear SVM": {"model__C": [0.1, 1, 10]},
+    "SVM (Nystroem)": {"model__linearsvc__C": [0.1, 1, 10]},
+    "Linear SVR": {"model__C": [0.1, 1, 10]},
+    "SVR (Nystroem)": {"model__linearsvr__C": [0.1, 1, 10]},
 }
 
+# monotone "size" parameters: a model grown with warm_start to size n contains the model of every smaller size
+WARM_START_PARAMS = ("n_estimators",)
+# grid values that are near-free checkpoints of a warm-started fit but full fits from scratch;
+# the GridSearchCV / Halving fallback (no fold cache, so no warm start) leaves them out
+WARM_START_CHECKPOINTS = {"n_estimators": (200,)}
+
 
 # ── evaluation ──────────────────────────────────────────────────
 
 
-def cross_validate_models(
-    models: dict, preprocessor: ColumnTransformer, X: pd.DataFrame, y, task: str
+def _make_cv(task: str, y):
+    cv = StratifiedKFold(5, shuffle=True, random_state=42) if task == "classification" else 5
+    return check_cv(cv, y, classifier=task == "classification")
+
+
+def _fit_and_score(model, Xt_train, y_train, Xt_test, y_test, scorer) -> float:
+    model.fit(Xt_train, y_train)
+    return scorer(model, Xt_test, y_test)
+
+
+def _fit_and_score_sizes(
+    model, param: str, sizes: list, Xt_train, y_train, Xt_test, y_test, scorer
+) -> list[tuple[float, float]]:
+    """Grow one warm-started model through increasing ``sizes``, scoring at each checkpoint.
+
+    Returns (score, seconds) per size, the seconds being the cumulative cost
+    of reaching that size.
+    """
+    model.set_params(warm_start=True)
+    start = time.perf_counter()
+    out = []
+    for size in sizes:
+        model.set_params(**{param: size}).fit(Xt_train, y_train)
+        out.append((scorer(model, Xt_test, y_test), time.perf_counter() - start))
+    return out
+
+
+def _warm_start_groups(candidates: list) -> list[tuple[str | None, list[int]]]:
+    """Group candidates that differ only in a warm-startable size parameter.
+
+    Returns ``(param, candidate indices sorted by size)`` per group; ``param`` is
+    None for singleton groups, which are fitted normally.
+    """
+    groups: dict = {}
+    for i, model in enumerate(candidates):
+        params = model.get_params()
+        param = next((p for p in WARM_START_PARAMS if p in params and "warm_start" in params), None)
+        rest = {k: v for k, v in params.items() if k != param}
+        groups.setdefault((type(model).__qualname__, param, joblib.hash(rest)), []).append(i)
+    out = []
+    for (_, param, _), members in groups.items():
+        if param is None or len(members) == 1:
+            out.extend((None, [i]) for i in members)
+        else:
+            out.append((param, sorted(members, key=lambda i: candidates[i].get_params()[param])))
+    return out
+
+
+def _subsample_order(y_train, task: str) -> np.ndarray:
+    """Shuffled row order whose prefixes are (approximately) class-stratified."""
+    order = np.random.default_rng(42).permutation(len(y_train))
+    if task != "classification":
+        return order
+    y_perm = np.asarray(y_train)[order]
+    _, inverse, counts = np.unique(y_perm, return_inverse=True, return_counts=True)
+    rank = np.zeros(len(order))
+    for c in range(len(counts)):
+        members = inverse == c
+        rank[members] = np.arange(counts[c]) / counts[c]
+    return order[np.argsort(rank, kind="stable")]
+
+
+def _cached_cv_scores(
+    candidates: list,
+    cache: FoldTransformCache,
+    X: pd.DataFrame,
+    y,
+    task: str,
+    n_samples: int | None = None,
+    results: ResultCache | None = None,
+    return_times: bool = False,
+):
+    """Score every candidate estimator on every fold; returns (n_candidates, n_folds).
+
+    With ``n_samples`` each candidate is trained on that many rows of the fold's
+    training split (scored on the full validation split).  With ``results``,
+    (candidate, fold) scores already on disk are reused and new ones are
+    persisted as they finish, so an interrupted search resumes where it stopped.
+    ``return_times`` also returns the fit+score seconds of every entry.
+    """
+    scorer = get_scorer("accuracy" if task == "classification" else "r2")
+    folds = list(_make_cv(task, y).split(X, y))
+    scores = np.full((len(folds), len(candidates)), np.nan)
+    seconds = np.full((len(folds), len(candidates)), np.nan)
+    keys = [[None] * len(candidates) for _ in folds]
+    if results is not None:
+        model_keys = [estimator_key(m) for m in candidates]
+        for f in range(len(folds)):
+            for c, mk in enumerate(model_keys):
+                keys[f][c] = results.key("cv", mk, f, n_samples)
+                scores[f, c], seconds[f, c] = results.get(keys[f][c], (np.nan, np.nan))
+    # one task per (fold, warm-start group) covering the group's missing candidates
+    groups = _warm_start_groups(candidates)
+    tasks = []
+    for f in range(len(folds)):
+        for param, members in groups:
+            pending = [c for c in members if np.isnan(scores[f, c])]
+            if pending:
+                tasks.append((f, param, pending))
+
+    def jobs():
+        # fold-major order so each fold is transformed once even under a tight cache budget
+        for f, (train_idx, test_idx) in enumerate(folds):
+            fold_tasks = [t for t in tasks if t[0] == f]
+            if not fold_tasks:
+                continue
+            Xt_train, Xt_test = cache.get(train_idx, test_idx)
+            y_train = y[train_idx]
+            if n_samples is not None and n_samples < len(train_idx):
+                rows = _subsample_order(y_train, task)[:n_samples]
+                Xt_train, y_train = Xt_train[rows], y_train[rows]
+            for _, param, pending in fold_tasks:
+                if param is None:
+                    yield delayed(_timed_fit_and_score)(
+                        clone(candidates[pending[0]]), Xt_train, y_train, Xt_test, y[test_idx], scorer
+                    )
+                else:
+                    sizes = [candidates[c].get_params()[param] for c in pending]
+                    yield delayed(_fit_and_score_sizes)(
+                        clone(candidates[pending[0]]), param, sizes, Xt_train, y_train, Xt_test, y[test_idx], scorer
+                    )
+
+    for (f, param, pending), out in zip(tasks, Parallel(n_jobs=-1, return_as="generator")(jobs())):
+        for c, (score, elapsed) in zip(pending, [out] if param is None else out):
+            scores[f, c], seconds[f, c] = score, elapsed
+            if results is not None:
+                results.put(keys[f][c], [float(score), elapsed])
+    return (scores.T, seconds.T) if return_times else scores.T
+
+
+def _halving_search(
+    candidates: list,
+    cache: FoldTransformCache,
+    X: pd.DataFrame,
+    y,
+    task: str,
+    factor: int = 3,
+    results: ResultCache | None = None,
+) -> tuple[int, float]:
+    """Successive halving over training-set size on the cached folds.
+
+    Every candidate starts on a small subsample; after each round only the top
+    ``1 / factor`` survive and the sample budget grows by ``factor``.
+    Returns (index of the winner, its final mean CV score).
+    """
+    max_resources = min(len(tr) for tr, _ in _make_cv(task, y).split(X, y))
+    n_classes = len(np.unique(y)) if task == "classification" else 1
+    min_resources = min(max_resources, max(20, 2 * 5 * n_classes))
+    n_rounds = 1 + min(
+        math.ceil(math.log(len(candidates), factor)) if len(candidates) > 1 else 0,
+        int(math.log(max_resources / min_resources, factor)),
+    )
+    alive = list(range(len(candidates)))
+    start = time.perf_counter()
+    best_score, time_to_best = -np.inf, 0.0
+    for rnd in range(n_rounds):
+        # spend the full budget in the last round, shrinking by ``factor`` per earlier round
+        n_samples = max(min_resources, max_resources // factor ** (n_rounds - 1 - rnd))
+        scores = _cached_cv_scores([candidates[i] for i in alive], cache, X, y, task, n_samples, results).mean(axis=1)
+        elapsed = time.perf_counter() - start
+        if scores.max() > best_score:
+            best_score, time_to_best = scores.max(), elapsed
+        print(f"  round {rnd + 1}/{n_rounds}: {len(alive):>3d} candidates × {n_samples:>6d} rows  "
+              f"best {scores.max():.4f}  ({elapsed:.1f}s)")
+        ranked = np.argsort(-scores, kind="stable")
+        if rnd == n_rounds - 1:
+            winner, final = alive[ranked[0]], scores[ranked[0]]
+        else:
+            keep = max(1, math.ceil(len(alive) / factor))
+            alive = [alive[i] for i in ranked[:keep]]
+    print(f"  Time to best score: {time_to_best:.1f}s of {time.perf_counter() - start:.1f}s")
+    return winner, final
+
+
+def _timed_fit_and_score(model, Xt_train, y_train, Xt_test, y_test, scorer) -> tuple[float, float]:
+    start = time.perf_counter()
+    score = _fit_and_score(model, Xt_train, y_train, Xt_test, y_test, scorer)
+    return score, time.perf_counter() - start
+
+
+def race_models(
+    models: dict,
+    cache: FoldTransformCache,
+    X: pd.DataFrame,
+    y,
+    task: str,
+    min_folds: int = 2,
+    tolerance: float = 0.01,
+    n_workers: int | None = None,
+    results: ResultCache | None = None,
 ) -> dict[str, tuple[float, float]]:
+    """Cross-validate every (model, fold) pair in one process pool, racing the models.
+
+    Tasks are queued fold-major so every model reports early folds first.
+    Once a model has ``min_folds`` scores, it is dropped (its queued folds are
+    cancelled) if even an optimistic bound on its mean, ``mean + 2·sem +
+    tolerance``, is below the running mean of the current leader.  Dropped
+    models keep the scores of the folds they finished.  A fold is transformed
+    and queued only when fewer than two folds' worth of tasks (at least two
+    per worker) are pending, so only a few folds' matrices are alive at once.  With ``results``,
+    (model, fold) scores on disk (shared with the non-racing CV) are reused and
+    new ones are persisted as they finish.
+    """
+    scorer = get_scorer("accuracy" if task == "classification" else "r2")
+    folds = list(_make_cv(task, y).split(X, y))
+    n_workers = n_workers or os.cpu_count()
+    max_pending = 2 * max(len(models), n_workers)
+    scores: dict[str, list[float]] = {name: [] for name in models}
+    seconds = dict.fromkeys(models, 0.0)
+    keys: dict[tuple[str, int], str] = {}
+    missing: list[list[str]] = []
+    n_cached = dict.fromkeys(models, 0)
+    for f in range(len(folds)):
+        missing.append([])
+        for name, model in models.items():
+            cached = None
+            if results is not None:
+                keys[name, f] = results.key("cv", estimator_key(model), f, None)
+                cached = results.get(keys[name, f])
+            if cached is None:
+                missing[f].append(name)
+            else:
+                scores[name].append(cached[0])
+                seconds[name] += cached[1]
+                n_cached[name] += 1
+    dropped: set[str] = set()
+    pending: dict = {}
+    next_fold = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        while True:
+            ready = {n: np.mean(s) for n, s in scores.items() if len(s) >= min_folds}
+            leader = max(ready.values(), default=None)
+            for name, mean in ready.items():
+                n = len(scores[name])
+                if name in dropped or n == len(folds):
+                    continue
+                sem = np.std(scores[name], ddof=1) / np.sqrt(n)
+                if mean + 2 * sem + tolerance < leader:
+                    dropped.add(name)
+                    for fut, (owner, _) in pending.items():
+                        if owner == name:
+                            fut.cancel()
+            while len(pending) < max_pending and next_fold < len(folds):
+                f, next_fold = next_fold, next_fold + 1
+                names = [n for n in missing[f] if n not in dropped]
+                if not names:
+                    continue
+                train_idx, test_idx = folds[f]
+                Xt_train, Xt_test = cache.get(train_idx, test_idx)
+                for name in names:
+                    fut = pool.submit(
+                        _timed_fit_and_score, clone(models[name]), Xt_train, y[train_idx], Xt_test, y[test_idx], scorer
+                    )
+                    pending[fut] = (name, f)
+                del Xt_train, Xt_test
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name, f = pending.pop(fut)
+                if fut.cancelled():
+                    continue
+                score, elapsed = fut.result()
+                scores[name].append(score)
+                seconds[name] += elapsed
+                if results is not None:
+                    results.put(keys[name, f], [float(score), elapsed])
+    print(f"\nModel race ({len(folds)} folds, {time.perf_counter() - start:.1f}s wall):")
+    for name in models:
+        status = f"dropped after {len(scores[name])} folds" if name in dropped else "completed"
+        if n_cached[name]:
+            status += f" ({n_cached[name]} cached)"
+        print(f"  {name:<28s} {seconds[name]:8.2f}s fit+score  {status}")
+    return {name: (np.mean(s), np.std(s), seconds[name] / max(len(s), 1)) for name, s in scores.items()}
+
+
+def cross_validate_models(
+    models: dict,
+    preprocessor: ColumnTransformer,
+    X: pd.DataFrame,
+    y,
+    task: str,
+    cache: FoldTransformCache | None = None,
+    race: bool = False,
+    results: ResultCache | None = None,
+) -> dict[str, tuple[float, float, float]]:
+    """(mean score, std, mean fit+score seconds per fold) for every model."""
+    if race:
+        # without a shared cache, each fold is transformed when race_models queues it; its matrices
+        # live until that fold's tasks finish, and race_models keeps only a few folds in flight
+        cache = cache if cache is not None else FoldTransformCache(preprocessor, X, max_bytes=0, y=y)
+        return race_models(models, cache, X, y, task, results=results)
+    if cache is not None:
+        scores, seconds = _cached_cv_scores(list(models.values()), cache, X, y, task, results=results,
+                                            return_times=True)
+        return {name: (s.mean(), s.std(), t.mean()) for name, s, t in zip(models, scores, seconds)}
     scoring = "accuracy" if task == "classification" else "r2"
     cv = StratifiedKFold(5, shuffle=True, random_state=42) if task == "classification" else 5
-    results: dict[str, tuple[float, float]] = {}
+    summary: dict[str, tuple[float, float, float]] = {}
     for name, model in models.items():
-        pipe = Pipeline([("pre", preprocessor), ("model", model)])
-        scores = cross_val_score(pipe, X, y, cv=cv, scoring=scoring, n_jobs=-1)
-        results[name] = (scores.mean(), scores.std())
-    return results
+        key = results.key("cv_scores", estimator_key(model)) if results is not None else None
+        cv_out = results.get(key) if results is not None else None
+        if cv_out is None:
+            pipe = Pipeline([("pre", preprocessor), ("model", model)])
+            out = cross_validate(pipe, X, y, cv=cv, scoring=scoring, n_jobs=-1)
+            cv_out = {"scores": out["test_score"].tolist(), "seconds": (out["fit_time"] + out["score_time"]).tolist()}
+            if results is not None:
+                results.put(key, cv_out)
+        summary[name] = (np.mean(cv_out["scores"]), np.std(cv_out["scores"]), np.mean(cv_out["seconds"]))
+    return summary
 
 
-def print_results(results: dict[str, tuple[float, float]], task: str) -> str:
+def print_results(results: dict[str, tuple[float, float, float]], task: str) -> str | None:
+    """Print the CV table; return the best model, or None when no model has a finite score."""
     metric_name = "accuracy" if task == "classification" else "R²"
-    best_name = max(results, key=lambda k: results[k][0])
-    print(f"\nCross-Validation Results (5-fold {metric_name}):")
-    for name, (mean, std) in sorted(results.items(), key=lambda x: -x[1][0]):
+    scored = [name for name in results if np.isfinite(results[name][0])]
+    best_name = max(scored, key=lambda k: results[k][0]) if scored else None
+    print(f"\nCross-Validation Results (5-fold {metric_name}, fit+score seconds per fold):")
+    for name, (mean, std, secs) in sorted(results.items(), key=lambda x: -np.nan_to_num(x[1][0], nan=-np.inf)):
         star = "  ★ best" if name == best_name else ""
-        print(f"  {name:<28s} {mean:.4f} ± {std:.4f}{star}")
+        print(f"  {name:<28s} {mean:.4f} ± {std:.4f}  {secs:8.2f}s{star}")
     return best_name
 
 
+def with_final_calibration(pipe: Pipeline) -> Pipeline:
+    """Switch on the calibrators ``get_models`` leaves off for CV and tuning, before the final refit."""
+    if isinstance(pipe[-1], DecisionCalibratedClassifier):
+        pipe.set_params(model__calibrate=True)
+    return pipe
+
+
 def tune_best(
     best_name: str,
     models: dict,
@@ -196,21 +861,414 @@ def tune_best(
     X_train: pd.DataFrame,
     y_train,
     task: str,
+    cache: FoldTransformCache | None = None,
+    tuner: str = "grid",
+    results: ResultCache | None = None,
 ) -> Pipeline:
     pipe = Pipeline([("pre", preprocessor), ("model", models[best_name])])
     grid = PARAM_GRIDS.get(best_name)
+    if grid and isinstance(models[best_name], DecisionCalibratedClassifier):
+        grid = {k.replace("model__", "model__estimator__", 1): v for k, v in grid.items()}
+    if grid and cache is None:
+        grid = {k: [v for v in values if v not in WARM_START_CHECKPOINTS.get(k.rsplit("__", 1)[-1], ())]
+                for k, values in grid.items()}
+    key = None
+    if grid and results is not None:
+        key = results.key("tuned", estimator_key(models[best_name]), grid, tuner, cache is not None)
+        tuned = results.load_object(key)
+        if tuned is not None:
+            print(f"\nTuning {best_name} ({tuner}) … cached")
+            print(f"  Best params: {tuned['params']}")
+            return tuned["pipeline"]
+    if grid and cache is not None:
+        print(f"\nTuning {best_name} ({tuner}) …")
+        params = list(ParameterGrid(grid))
+        candidates = [
+            clone(models[best_name]).set_params(**{k.removeprefix("model__"): v for k, v in p.items()})
+            for p in params
+        ]
+        n_fits = len(_warm_start_groups(candidates))
+        if n_fits < len(candidates):
+            print(f"  Warm start: {len(candidates)} candidates from {n_fits} growing fits per fold")
+        if tuner == "halving":
+            best_idx, _ = _halving_search(candidates, cache, X_train, y_train, task, results=results)
+        else:
+            scores = _cached_cv_scores(candidates, cache, X_train, y_train, task, results=results)
+            best_idx = int(np.argmax(scores.mean(axis=1)))
+        best_params = params[best_idx]
+        print(f"  Best params: {best_params}")
+        pipe = Pipeline([("pre", clone(preprocessor)), ("model", clone(models[best_name]))])
+        with_final_calibration(pipe.set_params(**best_params)).fit(X_train, y_train)
+        if key is not None:
+            results.save_object(key, {"pipeline": pipe, "params": best_params})
+        return pipe
     if grid:
         scoring = "accuracy" if task == "classification" else "r2"
         cv = StratifiedKFold(5, shuffle=True, random_state=42) if task == "classification" else 5
-        print(f"\nTuning {best_name} …")
-        gs = GridSearchCV(pipe, grid, cv=cv, scoring=scoring, n_jobs=-1, refit=True)
+        print(f"\nTuning {best_name} ({tuner}) …")
+        search_cls = HalvingGridSearchCV if tuner == "halving" else GridSearchCV
+        start = time.perf_counter()
+        gs = search_cls(pipe, grid, cv=cv, scoring=scoring, n_jobs=-1, refit=False)
         gs.fit(X_train, y_train)
-        print(f"  Best params: {gs.best_params_}")
-        return gs.best_estimator_
-    pipe.fit(X_train, y_train)
+        print(f"  Best params: {gs.best_params_}  ({time.perf_counter() - start:.1f}s)")
+        pipe = with_final_calibration(clone(pipe).set_params(**gs.best_params_)).fit(X_train, y_train)
+        if key is not None:
+            results.save_object(key, {"pipeline": pipe, "params": gs.best_params_})
+        return pipe
+    with_final_calibration(pipe).fit(X_train, y_train)
     return pipe
 
 
+# ── streaming models ────────────────────────────────────────────
+
+
+class IncrementalPreprocessor(TransformerMixin, BaseEstimator):
+    """Streaming counterpart of :func:`build_preprocessor`, fitted chunk by chunk.
+
+    Numeric columns are mean-imputed from running sums and scaled with a
+    ``partial_fit`` scaler (``"standard"``, or ``"minmax"`` for estimators that
+    need non-negative input); categorical columns are one-hot encoded over the
+    levels seen so far.
+    """
+
+    def __init__(self, scaling: str = "standard", max_categories: int = 1000):
+        self.scaling = scaling
+        self.max_categories = max_categories
+
+    def partial_fit(self, X: pd.DataFrame, y=None):
+        if not hasattr(self, "scaler_"):
+            self.num_cols_ = X.select_dtypes(include=["number"]).columns.tolist()
+            self.cat_cols_ = X.select_dtypes(exclude=["number"]).columns.tolist()
+            self.scaler_ = StandardScaler() if self.scaling == "standard" else MinMaxScaler()
+            self.sum_ = np.zeros(len(self.num_cols_))
+            self.count_ = np.zeros(len(self.num_cols_))
+            self.levels_ = {c: set() for c in self.cat_cols_}
+        if self.num_cols_:
+            num = X[self.num_cols_].to_numpy(dtype=np.float64, na_value=np.nan)
+            self.sum_ += np.nansum(num, axis=0)
+            self.count_ += (~np.isnan(num)).sum(axis=0)
+            self.scaler_.partial_fit(num)
+        for c in self.cat_cols_:
+            if len(self.levels_[c]) < self.max_categories:
+                self.levels_[c].update(X[c].dropna().astype(str).unique())
+        return self
+
+    def fit(self, X: pd.DataFrame, y=None):
+        for attr in ("scaler_", "sum_", "count_", "levels_"):
+            self.__dict__.pop(attr, None)
+        return self.partial_fit(X)
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        blocks = []
+        if self.num_cols_:
+            num = X[self.num_cols_].to_numpy(dtype=np.float64, na_value=np.nan)
+            mean = self.sum_ / np.maximum(self.count_, 1)
+            num = np.where(np.isnan(num), mean, num)
+            num = self.scaler_.transform(num)
+            blocks.append(np.clip(num, 0, 1) if self.scaling == "minmax" else num)
+        for c in self.cat_cols_:
+            levels = sorted(self.levels_[c])
+            codes = pd.Categorical(X[c].astype(str), categories=levels).codes
+            blocks.append((codes[:, None] == np.arange(len(levels))).astype(np.float64))
+        return np.hstack(blocks) if blocks else np.empty((len(X), 0))
+
+
+def get_streaming_models(task: str) -> dict[str, object]:
+    """Estimators with ``partial_fit``, trained one chunk at a time."""
+    if task == "classification":
+        return {
+            "SGD (logistic)": SGDClassifier(loss="log_loss", random_state=42),
+            "SGD (linear SVM)": SGDClassifier(loss="hinge", random_state=42),
+            "Gaussian NB": GaussianNB(),
+            "Multinomial NB": MultinomialNB(),
+            "MLP (mini-batch)": MLPClassifier(hidden_layer_sizes=(64,), random_state=42),
+        }
+    return {
+        "SGD Regressor": SGDRegressor(random_state=42),
+        "SGD (Huber)": SGDRegressor(loss="huber", random_state=42),
+        "MLP (mini-batch)": MLPRegressor(hidden_layer_sizes=(64,), random_state=42),
+    }
+
+
+def _scaling_for(model) -> str:
+    return "minmax" if isinstance(model, MultinomialNB) else "standard"
+
+
+def _partial_fit(model, Xt, y, classes) -> None:
+    if is_classifier(model):
+        model.partial_fit(Xt, y, classes=classes)
+    else:
+        model.partial_fit(Xt, y)
+
+
+class _StreamingScore:
+    """Accuracy or R² accumulated over evaluation chunks."""
+
+    def __init__(self, task: str):
+        self.task = task
+        self.n = 0
+        self.correct = 0
+        self.sse = self.sum_y = self.sum_y2 = 0.0
+
+    def update(self, y_true, y_pred) -> None:
+        self.n += len(y_true)
+        if self.task == "classification":
+            self.correct += int(np.sum(y_true == y_pred))
+        else:
+            y_true = np.asarray(y_true, dtype=np.float64)
+            self.sse += float(np.sum((y_true - y_pred) ** 2))
+            self.sum_y += float(y_true.sum())
+            self.sum_y2 += float(np.sum(y_true**2))
+
+    def value(self) -> float:
+        if self.task == "classification":
+            return self.correct / self.n
+        sst = self.sum_y2 - self.sum_y**2 / self.n
+        return 1 - self.sse / sst
+
+
+def _chunk_folds(i: int, n_rows: int, n_folds: int, seed: int = 42) -> np.ndarray:
+    """Fold of every row in chunk ``i``: seeded by the chunk index, so identical on every pass."""
+    return np.random.default_rng([seed, i]).integers(0, n_folds, n_rows)
+
+
+def _chunk_order(i: int, n_rows: int, epoch: int, seed: int = 42) -> np.ndarray:
+    """Row order for one ``partial_fit`` pass over chunk ``i``; SGD and MLP need shuffled, not file-ordered, rows."""
+    return np.random.default_rng([seed, epoch, i]).permutation(n_rows)
+
+
+def stream_cross_validate(
+    path: str,
+    target: str,
+    chunksize: int,
+    task: str,
+    classes,
+    models: dict,
+    dtypes: dict[str, str] | None = None,
+    n_folds: int = 5,
+    epochs: int = 1,
+) -> tuple[dict[str, tuple[float, float, float]], dict[str, IncrementalPreprocessor]]:
+    """Out-of-core K-fold CV for ``partial_fit`` models in three passes over the file.
+
+    Every row gets a fold drawn from an RNG seeded by its chunk index, so
+    each chunk (even a file that is one chunk) feeds every fold's training
+    set and its holdout.  Pass 1 fits one preprocessor per fold (on its training
+    rows) plus one on every row; pass 2 trains a copy of each model per fold
+    on shuffled training rows; pass 3 scores each fold's models on its
+    held-out rows.  Only one chunk is ever in memory.  Returns the CV results
+    and the all-row preprocessors (keyed by scaling) for the final fit.
+    """
+    scalings = sorted({_scaling_for(m) for m in models.values()})
+    fold_pre = [{s: IncrementalPreprocessor(s) for s in scalings} for _ in range(n_folds)]
+    full_pre = {s: IncrementalPreprocessor(s) for s in scalings}
+    for i, (X_chunk, _) in enumerate(iter_csv_chunks(path, target, chunksize, dtypes)):
+        folds = _chunk_folds(i, len(X_chunk), n_folds)
+        for s in scalings:
+            full_pre[s].partial_fit(X_chunk)
+            for f in range(n_folds):
+                if (folds != f).any():
+                    fold_pre[f][s].partial_fit(X_chunk[folds != f])
+
+    fold_models = [{name: clone(m) for name, m in models.items()} for _ in range(n_folds)]
+    fit_seconds = dict.fromkeys(models, 0.0)
+    for epoch in range(epochs):
+        for i, (X_chunk, y_chunk) in enumerate(iter_csv_chunks(path, target, chunksize, dtypes)):
+            folds = _chunk_folds(i, len(X_chunk), n_folds)
+            order = _chunk_order(i, len(X_chunk), epoch)
+            X_chunk, y_chunk, folds = X_chunk.iloc[order], y_chunk[order], folds[order]
+            for f in range(n_folds):
+                train = folds != f
+                if not train.any():
+                    continue
+                Xt = {s: fold_pre[f][s].transform(X_chunk[train]) for s in scalings}
+                for name, model in fold_models[f].items():
+                    start = time.perf_counter()
+                    _partial_fit(model, Xt[_scaling_for(model)], y_chunk[train], classes)
+                    fit_seconds[name] += time.perf_counter() - start
+
+    scores = [{name: _StreamingScore(task) for name in models} for _ in range(n_folds)]
+    for i, (X_chunk, y_chunk) in enumerate(iter_csv_chunks(path, target, chunksize, dtypes)):
+        folds = _chunk_folds(i, len(X_chunk), n_folds)
+        for f in range(n_folds):
+            held_out = folds == f
+            if not held_out.any() or not hasattr(fold_pre[f][scalings[0]], "scaler_"):
+                continue  # tiny files: a fold with no holdout rows or no training rows
+            Xt = {s: fold_pre[f][s].transform(X_chunk[held_out]) for s in scalings}
+            for name, model in fold_models[f].items():
+                scores[f][name].update(y_chunk[held_out], model.predict(Xt[_scaling_for(model)]))
+
+    results = {}
+    for name in models:
+        fold_scores = [scores[f][name].value() for f in range(n_folds) if scores[f][name].n]
+        mean, std = (np.mean(fold_scores), np.std(fold_scores)) if fold_scores else (np.nan, np.nan)
+        results[name] = (mean, std, fit_seconds[name] / n_folds)
+    return results, full_pre
+
+
+def fit_streaming(
+    model, pre: IncrementalPreprocessor, path: str, target: str, chunksize: int,
+    classes, dtypes: dict[str, str] | None = None, epochs: int = 1,
+) -> Pipeline:
+    """Train ``model`` on every chunk, rows shuffled; the result is a regular predict-ready Pipeline."""
+    model = clone(model)
+    for epoch in range(epochs):
+        for i, (X_chunk, y_chunk) in enumerate(iter_csv_chunks(path, target, chunksize, dtypes)):
+            order = _chunk_order(i, len(X_chunk), epoch)
+            _partial_fit(model, pre.transform(X_chunk.iloc[order]), y_chunk[order], classes)
+    return Pipeline([("pre", pre), ("model", model)])
+
+
+def run_streaming(args: argparse.Namespace) -> None:
+    """``--streaming`` entry point: out-of-core CV, selection and final fit of partial_fit models."""
+    chunksize = args.chunksize or 100_000
+    tag = Path(args.csv).stem
+    dtypes = infer_compact_dtypes(args.csv, args.target)
+    stats = ColumnStats()
+    for X_chunk, y_chunk in iter_csv_chunks(args.csv, args.target, chunksize, dtypes):
+        stats.update(X_chunk, y_chunk)
+    task = stats.task
+    classes = np.array(sorted(stats.target_levels, key=str)) if task == "classification" else None
+
+    print("═" * 55)
+    print(f"  ML Pipeline (streaming) — {tag} ({task})")
+    print("═" * 55)
+    info = f"Dataset: {stats.n_rows} samples, {len(stats.nulls)} features, chunks of {chunksize}"
+    if classes is not None:
+        info += f", {len(classes)} classes"
+    print(info)
+
+    models = get_streaming_models(task)
+    results, full_pre = stream_cross_validate(
+        args.csv, args.target, chunksize, task, classes, models, dtypes, epochs=args.epochs
+    )
+    best_name = print_results(results, task)
+    if best_name is None:
+        sys.exit("No model produced a cross-validation score; nothing to train.")
+
+    print(f"\nTraining {best_name} on all chunks …")
+    best = models[best_name]
+    best_pipe = fit_streaming(
+        best, full_pre[_scaling_for(best)], args.csv, args.target, chunksize, classes, dtypes, args.epochs
+    )
+    if args.save_model:
+        save_model(best_pipe, args.save_model, list(stats.nulls), task)
+    save_comparison_chart(results, task, tag)
+    print("\nDone ✓")
+
+
+# ── persistence ─────────────────────────────────────────────────
+
+
+def save_model(pipe: Pipeline, path: Path, columns: list[str], task: str, classes=None) -> None:
+    """Dump the fitted pipeline uncompressed so its arrays can be memory-mapped on load."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    bundle = {"pipeline": pipe, "columns": columns, "task": task,
+              "classes": None if classes is None else list(classes)}
+    joblib.dump(bundle, path, compress=0)
+    print(f"  Saved model to {path}")
+
+
+def load_model(path: Path, mmap: bool = True) -> dict:
+    """Load a bundle written by :func:`save_model`; large arrays stay memory-mapped."""
+    return joblib.load(path, mmap_mode="r" if mmap else None)
+
+
+# ── permutation importance ──────────────────────────────────────
+
+
+def _score_rows(y_true: np.ndarray, pred: np.ndarray, task: str) -> np.ndarray:
+    """Accuracy / R² of each row of ``pred`` (shape ``(..., n)``) against ``y_true``."""
+    if task == "classification":
+        return (pred == y_true).mean(axis=-1)
+    ss_tot = ((y_true - y_true.mean()) ** 2).sum()
+    return 1 - ((pred - y_true) ** 2).sum(axis=-1) / ss_tot
+
+
+def _permuted_block_scores(model, Xt, y: np.ndarray, cols: list[int], perms: np.ndarray, task: str) -> np.ndarray:
+    """Score every (column, repeat) copy of Xt in ``cols`` with one stacked predict call."""
+    n = Xt.shape[0]
+    if sparse.issparse(Xt):
+        # a permuted CSC column is the same values with remapped row indices
+        inverse = np.argsort(perms, axis=1)
+        copies = []
+        for j in cols:
+            lo, hi = Xt.indptr[j], Xt.indptr[j + 1]
+            for inv in inverse:
+                indices = Xt.indices.copy()
+                indices[lo:hi] = inv[indices[lo:hi]]
+                copies.append(sparse.csc_matrix((Xt.data, indices, Xt.indptr), shape=Xt.shape))
+        stacked = sparse.vstack(copies, format="csr")
+    else:
+        stacked = np.tile(Xt, (len(cols) * len(perms), 1))
+        for c, j in enumerate(cols):
+            for r, perm in enumerate(perms):
+                start = (c * len(perms) + r) * n
+                stacked[start:start + n, j] = Xt[perm, j]
+    pred = np.asarray(model.predict(stacked)).reshape(len(cols), len(perms), n)
+    return _score_rows(y, pred, task)
+
+
+def _permuted_inplace_scores(model, Xt: np.ndarray, y: np.ndarray, cols: list[int], perms: np.ndarray,
+                             task: str) -> np.ndarray:
+    """Score each (column, repeat) on one working copy of dense Xt, permuting a column in place and restoring it."""
+    work = Xt.copy()
+    scores = np.empty((len(cols), len(perms)))
+    for c, j in enumerate(cols):
+        original = Xt[:, j]
+        for r, perm in enumerate(perms):
+            work[:, j] = original[perm]
+            scores[c, r] = _score_rows(y, np.asarray(model.predict(work)), task)
+        work[:, j] = original
+    return scores
+
+
+def permutation_importances(
+    model,
+    Xt,
+    y,
+    task: str,
+    n_repeats: int = 5,
+    max_rows: int | None = 2000,
+    block_mb: int = 64,
+    n_jobs: int = -1,
+    seed: int = 42,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Mean and std of the score drop when each transformed column is shuffled.
+
+    Columns are permuted in blocks: all copies of a block are stacked and
+    scored with a single ``predict`` call, and blocks run in parallel.  When
+    even one column's copies exceed ``block_mb`` (wide dense data), each
+    block instead permutes one column at a time in place on a single working
+    copy, so a worker never holds more than one extra copy of ``Xt``.
+    """
+    rng = np.random.default_rng(seed)
+    y = np.asarray(y)
+    if max_rows and Xt.shape[0] > max_rows:
+        rows = np.sort(rng.choice(Xt.shape[0], max_rows, replace=False))
+        Xt, y = Xt[rows], y[rows]
+    if sparse.issparse(Xt):
+        Xt = Xt.tocsc()
+        copy_bytes = Xt.data.nbytes + Xt.indices.nbytes
+    else:
+        Xt = np.ascontiguousarray(Xt)
+        copy_bytes = Xt.nbytes
+    n_features = Xt.shape[1]
+    perms = np.stack([rng.permutation(Xt.shape[0]) for _ in range(n_repeats)])
+    baseline = _score_rows(y, np.asarray(model.predict(Xt)), task)
+
+    n_workers = joblib.cpu_count() if n_jobs == -1 else n_jobs
+    per_block = max(1, block_mb * 2**20 // max(copy_bytes * n_repeats, 1))
+    per_block = min(per_block, math.ceil(n_features / n_workers))
+    in_place = not sparse.issparse(Xt) and copy_bytes * n_repeats > block_mb * 2**20
+    score_block = _permuted_inplace_scores if in_place else _permuted_block_scores
+    blocks = [list(range(i, min(i + per_block, n_features))) for i in range(0, n_features, per_block)]
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(score_block)(model, Xt, y, cols, perms, task) for cols in blocks
+    )
+    drops = baseline - np.concatenate(scores)
+    return drops.mean(axis=1), drops.std(axis=1)
+
+
 # ── plots ───────────────────────────────────────────────────────
 
 
@@ -238,13 +1296,33 @@ def save_roc_curves(pipe: Pipeline, X_test, y_test, labels, tag: str) -> None:
     print(f"  Saved {OUTPUT_DIR / f'{tag}_roc.png'}")
 
 
-def save_feature_importance(pipe: Pipeline, feature_names: list[str], tag: str) -> None:
+def save_feature_importance(
+    pipe: Pipeline,
+    feature_names: list[str],
+    tag: str,
+    Xt_test=None,
+    y_test=None,
+    task: str = "classification",
+    method: str = "auto",
+    max_rows: int | None = 2000,
+    n_repeats: int = 5,
+) -> None:
+    """Native importances (trees / linear models) or permutation importance on the transformed test set."""
     OUTPUT_DIR.mkdir(exist_ok=True)
     model = pipe.named_steps["model"]
-    if hasattr(model, "feature_importances_"):
+    errors = None
+    if method != "permutation" and hasattr(model, "feature_importances_"):
         importances = model.feature_importances_
-    elif hasattr(model, "coef_"):
+        title = "Feature Importance (top 20)"
+    elif method != "permutation" and hasattr(model, "coef_"):
         importances = np.abs(model.coef_).mean(axis=0) if model.coef_.ndim > 1 else np.abs(model.coef_)
+        title = "Feature Importance (top 20)"
+    elif method != "native" and Xt_test is not None:
+        start = time.perf_counter()
+        importances, errors = permutation_importances(model, Xt_test, y_test, task, n_repeats, max_rows)
+        print(f"  Permutation importance: {len(importances)} columns × {n_repeats} repeats "
+              f"in {time.perf_counter() - start:.1f}s")
+        title = "Permutation Importance (top 20)"
     else:
         return
     # get transformed feature names
@@ -257,26 +1335,35 @@ def save_feature_importance(pipe: Pipeline, feature_names: list[str], tag: str)
         names = [f"f{i}" for i in range(len(importances))]
     idx = np.argsort(importances)[-20:]  # top 20
     fig, ax = plt.subplots(figsize=(8, max(4, len(idx) * 0.35)))
-    ax.barh(range(len(idx)), importances[idx], color="#2bb0a7")
+    ax.barh(range(len(idx)), importances[idx], xerr=None if errors is None else errors[idx],
+            color="#2bb0a7", capsize=3)
     ax.set_yticks(range(len(idx)))
     ax.set_yticklabels([names[i] for i in idx])
-    ax.set_title("Feature Importance (top 20)")
+    ax.set_title(title)
     fig.tight_layout()
     fig.savefig(OUTPUT_DIR / f"{tag}_feature_importance.png", dpi=150)
     plt.close(fig)
     print(f"  Saved {OUTPUT_DIR / f'{tag}_feature_importance.png'}")
 
 
-def save_comparison_chart(results: dict[str, tuple[float, float]], task: str, tag: str) -> None:
+def save_comparison_chart(results: dict[str, tuple[float, float, float]], task: str, tag: str) -> None:
     OUTPUT_DIR.mkdir(exist_ok=True)
     names = list(results.keys())
     means = [results[n][0] for n in names]
     stds = [results[n][1] for n in names]
-    fig, ax = plt.subplots(figsize=(10, 5))
+    secs = [results[n][2] for n in names]
+    fig, (ax, ax_t) = plt.subplots(1, 2, figsize=(16, 5))
     bars = ax.barh(names, means, xerr=stds, color="#2bb0a7", capsize=4)
     metric = "Accuracy" if task == "classification" else "R²"
     ax.set_xlabel(metric)
     ax.set_title("Model Comparison (5-fold CV)")
+    ax_t.errorbar(secs, means, yerr=stds, fmt="o", color="#2bb0a7", capsize=4)
+    for name, x, y in zip(names, secs, means):
+        ax_t.annotate(name, (x, y), textcoords="offset points", xytext=(5, 5), fontsize=8)
+    ax_t.set_xscale("log")
+    ax_t.set_xlabel("fit + score seconds per fold")
+    ax_t.set_ylabel(metric)
+    ax_t.set_title(f"{metric} vs training cost")
     fig.tight_layout()
     fig.savefig(OUTPUT_DIR / f"{tag}_comparison.png", dpi=150)
     plt.close(fig)
@@ -286,6 +1373,30 @@ def save_comparison_chart(results: dict[str, tuple[float, float]], task: str, ta
 # ── main ────────────────────────────────────────────────────────
 
 
+def predict_compiled(model, Xt: np.ndarray, y_ref: np.ndarray) -> np.ndarray:
+    """Re-score the transformed test set with the compiled tree predictor, checking it matches sklearn exactly."""
+    from tree_compiler import HAS_NUMBA, can_compile, compile_model  # opt-in: only loaded for --compile-trees
+
+    if not HAS_NUMBA:
+        print("  --compile-trees: numba is not installed, skipped")
+        return y_ref
+    if not can_compile(model):
+        print(f"  --compile-trees: {type(model).__name__} is not a supported tree model, skipped")
+        return y_ref
+    compiled = compile_model(model)
+    compiled.predict(Xt[:1])  # JIT warm-up
+    start = time.perf_counter()
+    model.predict(Xt)
+    t_ref = time.perf_counter() - start
+    start = time.perf_counter()
+    y_pred = compiled.predict(Xt)
+    t_out = time.perf_counter() - start
+    same = np.array_equal(y_pred, y_ref)
+    print(f"  Compiled {compiled.compiled.n_trees} trees: predict {t_ref * 1e3:.1f} ms → {t_out * 1e3:.1f} ms, "
+          f"identical: {same}")
+    return y_pred if same else y_ref
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Supervised ML Pipeline")
     group = parser.add_mutually_exclusive_group(required=True)
@@ -294,19 +1405,74 @@ def main() -> None:
     parser.add_argument("--target", type=str, default="target", help="Target column name (for CSV)")
     parser.add_argument("--test-size", type=float, default=0.2)
     parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache-mb", type=int, default=512,
+                        help="Memory budget for cached per-fold preprocessing (0 disables)")
+    parser.add_argument("--tuner", choices=["grid", "halving"], default="grid",
+                        help="Exhaustive grid search or successive halving over training-set size")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream the CSV in chunks of this many rows with compact dtypes")
+    parser.add_argument("--race", action="store_true",
+                        help="Race all (model, fold) fits in one process pool and drop clear losers early")
+    parser.add_argument("--csv-cache", type=Path, default=DEFAULT_CACHE_DIR,
+                        help="Directory for the parsed-CSV columnar cache")
+    parser.add_argument("--no-csv-cache", action="store_true", help="Always re-parse the CSV")
+    parser.add_argument("--result-cache", type=Path, default=DEFAULT_RESULT_DIR,
+                        help="Directory of persisted CV scores and tuned models, reused on reruns")
+    parser.add_argument("--no-result-cache", action="store_true", help="Recompute every score")
+    parser.add_argument("--save-model", type=Path, default=None,
+                        help="Save the tuned pipeline here (load with serve_model.py)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Out-of-core mode: train partial_fit models chunk by chunk (needs --csv)")
+    parser.add_argument("--epochs", type=int, default=1, help="Passes over the file in --streaming mode")
+    parser.add_argument("--sparse", action="store_true",
+                        help="Keep one-hot / hashed categoricals as CSR instead of densifying")
+    parser.add_argument("--max-onehot", type=int, default=None,
+                        help="Categoricals with more levels than this use --high-card encoding")
+    parser.add_argument("--high-card", choices=["target", "hash"], default="target",
+                        help="Out-of-fold target encoding or feature hashing for high-cardinality columns")
+    parser.add_argument("--hash-features", type=int, default=2**10, help="Buckets for --high-card hash")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-stage wall/CPU/peak RSS and per-model latency to outputs/<tag>_profile.*")
+    parser.add_argument("--importance", choices=["auto", "native", "permutation"], default="auto",
+                        help="auto: feature_importances_/coef_ when the model has them, else permutation")
+    parser.add_argument("--importance-rows", type=int, default=2000,
+                        help="Test rows subsampled for permutation importance (0 = all)")
+    parser.add_argument("--importance-repeats", type=int, default=5, help="Shuffles per column")
+    parser.add_argument("--svm-proba", choices=("platt",) + CALIBRATION_METHODS, default="platt",
+                        help="SVM probabilities: libsvm Platt (probability=True, ~5× fit cost), one fit "
+                             "calibrated on out-of-fold decision scores (sigmoid / isotonic) or their softmax")
+    parser.add_argument("--fast", action="store_true",
+                        help="Fast model zoo: early-stopped HistGradientBoosting, linear/Nystroem SVM, KD-tree KNN")
+    parser.add_argument("--compile-trees", action="store_true",
+                        help="Score the test set with an array-compiled copy of the best tree model")
     args = parser.parse_args()
 
+    if args.streaming:
+        if not args.csv:
+            parser.error("--streaming requires --csv")
+        return run_streaming(args)
+
+    prof = StageProfiler(enabled=args.profile)
+
     # load data
-    if args.dataset:
-        df, target, task = load_builtin(args.dataset)
-        tag = args.dataset
-    else:
-        df, target, task = load_csv(args.csv, args.target)
-        tag = Path(args.csv).stem
+    with prof.stage("load"):
+        if args.dataset:
+            df, target, task = load_builtin(args.dataset)
+            tag = args.dataset
+        elif args.chunksize:
+            df, target, task, stats = load_csv_chunked(args.csv, args.target, args.chunksize)
+            tag = Path(args.csv).stem
+            print(f"Streamed {stats.n_rows} rows in chunks of {args.chunksize} "
+                  f"({df.memory_usage(deep=True).sum() / 2**20:.1f} MB in memory)")
+            print(stats.summary().head(30).to_string(float_format=lambda v: f"{v:.4g}"))
+        else:
+            df, target, task = load_csv(args.csv, args.target, None if args.no_csv_cache else args.csv_cache)
+            tag = Path(args.csv).stem
 
     X = df.drop(columns=[target])
     y = df[target].values
 
+    le = None
     if task == "classification" and y.dtype == object:
         le = LabelEncoder()
         y = le.fit_transform(y)
@@ -321,25 +1487,76 @@ def main() -> None:
     print(info)
 
     # split
-    if task == "classification":
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=args.test_size, random_state=args.seed, stratify=y
+    with prof.stage("split"):
+        if task == "classification":
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=args.test_size, random_state=args.seed, stratify=y
+            )
+        else:
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=args.test_size, random_state=args.seed
+            )
+
+    with prof.stage("preprocess"):
+        preprocessor = build_preprocessor(
+            X_train, args.sparse, args.max_onehot, args.high_card, args.hash_features
         )
+        if prof.enabled:
+            clone(preprocessor).fit_transform(X_train, y_train)
+    if args.fast:
+        models = get_fast_models(task, args.sparse)
+        if args.sparse:
+            print("  --fast --sparse: Hist Gradient Boosting skipped (needs dense input)")
     else:
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=args.test_size, random_state=args.seed
-        )
-
-    preprocessor = build_preprocessor(X_train)
-    models = get_models(task)
+        models = get_models(task, args.svm_proba)
+    cache = (
+        FoldTransformCache(preprocessor, X_train, args.cache_mb * 2**20, y=y_train) if args.cache_mb > 0 else None
+    )
+    results_cache = None
+    if not args.no_result_cache:
+        results_cache = ResultCache(args.result_cache, {
+            "data": joblib.hash((X_train, y_train)),
+            "task": task,
+            "seed": args.seed,
+            "test_size": args.test_size,
+            "preprocessor": joblib.hash(clone(preprocessor)),
+        })
 
     # cross-validate all
-    results = cross_validate_models(models, preprocessor, X_train, y_train, task)
+    if prof.enabled and not args.race:
+        results = {}
+        for name, model in models.items():
+            with prof.stage(f"cv: {name}", cache=results_cache):
+                results.update(cross_validate_models(
+                    {name: model}, preprocessor, X_train, y_train, task, cache, results=results_cache
+                ))
+            pipe = Pipeline([("pre", clone(preprocessor)), ("model", clone(model))])
+            prof.time_model(name, pipe, X_train, y_train, X_test)
+    else:
+        with prof.stage("cv (race)" if args.race else "cv", cache=results_cache):
+            results = cross_validate_models(
+                models, preprocessor, X_train, y_train, task, cache, args.race, results_cache
+            )
     best_name = print_results(results, task)
+    if best_name is None:
+        sys.exit("No model produced a cross-validation score; nothing to tune.")
 
     # tune & evaluate
-    best_pipe = tune_best(best_name, models, preprocessor, X_train, y_train, task)
-    y_pred = best_pipe.predict(X_test)
+    with prof.stage("tuning", cache=results_cache):
+        best_pipe = tune_best(
+            best_name, models, preprocessor, X_train, y_train, task, cache, args.tuner, results_cache
+        )
+    if cache is not None:
+        print(f"  Transform cache: {cache.stats()}")
+    if results_cache is not None:
+        print(f"  Result cache: {results_cache.stats()}")
+    if args.save_model:
+        save_model(best_pipe, args.save_model, X.columns.tolist(), task, le.classes_ if le else None)
+    with prof.stage("test predict"):
+        Xt_test = best_pipe[:-1].transform(X_test)  # shared by --compile-trees and permutation importance
+        y_pred = best_pipe[-1].predict(Xt_test)
+    if args.compile_trees:
+        y_pred = predict_compiled(best_pipe[-1], Xt_test, y_pred)
 
     print(f"\nTest Evaluation ({best_name}):")
     if task == "classification":
@@ -347,17 +1564,27 @@ def main() -> None:
         print(f"\n{classification_report(y_test, y_pred)}")
         labels = BUILTIN_DATASETS.get(tag, (None, None))[0]
         label_names = labels().target_names if labels else [str(c) for c in np.unique(y)]
-        save_confusion_matrix(best_pipe, X_test, y_test, label_names, tag)
-        save_roc_curves(best_pipe, X_test, y_test, label_names, tag)
+        with prof.stage("save_confusion_matrix"):
+            save_confusion_matrix(best_pipe, X_test, y_test, label_names, tag)
+        with prof.stage("save_roc_curves"):
+            save_roc_curves(best_pipe, X_test, y_test, label_names, tag)
     else:
         print(f"  R²:  {r2_score(y_test, y_pred):.4f}")
         print(f"  MAE: {mean_absolute_error(y_test, y_pred):.4f}")
         print(f"  RMSE: {np.sqrt(mean_squared_error(y_test, y_pred)):.4f}")
 
-    save_feature_importance(best_pipe, X.columns.tolist(), tag)
-    save_comparison_chart(results, task, tag)
+    with prof.stage("save_feature_importance"):
+        save_feature_importance(best_pipe, X.columns.tolist(), tag, Xt_test, y_test, task,
+                                args.importance, args.importance_rows, args.importance_repeats)
+    with prof.stage("save_comparison_chart"):
+        save_comparison_chart(results, task, tag)
+    prof.report(OUTPUT_DIR / f"{tag}_profile", {"script": "ml_pipeline", "tag": tag, "task": task,
+                                                "rows": len(df), "features": X.shape[1]})
     print("\nDone ✓")
 
 
 if __name__ == "__main__":
-    main()
+    # run through the importable module so pickled helpers (IncrementalPreprocessor, …)
+    # resolve as ml_pipeline.* when loaded by serve_model.py rather than as __main__.*
+    import ml_pipeline
+    ml_pipeline.main()
@@ -0,0 +1,190 @@
+"""
+score_model.py — Offline, chunked batch scoring with a saved ml_pipeline model.
+
+The input file is read in chunks, and each chunk is preprocessed and scored
+by a pool of worker processes that each load the model bundle memory-mapped,
+so the fitted arrays are shared pages rather than one copy per worker.
+Predictions are streamed to the output file in input order with only a
+bounded window of chunks in flight.  Throughput and peak memory (scheduler
+plus workers) are reported at the end.
+
+Usage:
+    python ml_pipeline.py --csv data.csv --target label --save-model models/best.joblib
+    python score_model.py --model models/best.joblib --input big.csv --output preds.csv --workers 8
+    python score_model.py --model models/best.joblib --input big.parquet --output preds.parquet --proba --keep id
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.profiling import StageProfiler
+from ml_pipeline import load_model
+from stacked_inference import _ordered
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+ARROW_SUFFIXES = (".parquet", ".feather", ".arrow")
+
+
+# ── input / output ──────────────────────────────────────────────
+
+
+def iter_chunks(path: Path, chunksize: int, columns: list[str] | None = None) -> Iterator[pd.DataFrame]:
+    """Yield DataFrame chunks of a CSV, Parquet or Feather/Arrow file."""
+    if path.suffix not in ARROW_SUFFIXES:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+        return
+    if not HAS_ARROW:
+        sys.exit(f"Reading {path.suffix} files needs pyarrow (pip install pyarrow)")
+    if path.suffix == ".parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+        return
+    reader = pa.ipc.open_file(pa.memory_map(str(path)))
+    for i in range(reader.num_record_batches):
+        table = pa.Table.from_batches([reader.get_batch(i)])
+        for start in range(0, table.num_rows, chunksize):
+            part = table.slice(start, chunksize)
+            yield (part.select(columns) if columns else part).to_pandas()
+
+
+class PredictionWriter:
+    """Appends prediction frames to a CSV, or to a Parquet file through one open writer."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.parquet = path.suffix == ".parquet"
+        if self.parquet and not HAS_ARROW:
+            sys.exit("Writing .parquet files needs pyarrow (pip install pyarrow)")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = None
+        self._header = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.parquet:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+            return
+        df.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+        self._header = False
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+# ── scoring ─────────────────────────────────────────────────────
+
+_WORKER: dict = {}
+
+
+def _init_worker(model_path: str, proba: bool) -> None:
+    threadpool_limits(1)
+    _WORKER["bundle"] = load_model(Path(model_path))
+    _WORKER["proba"] = proba
+
+
+def score_chunk(bundle: dict, X: pd.DataFrame, proba: bool = False) -> pd.DataFrame:
+    """Predictions (and optionally class probabilities) for one chunk of raw feature rows."""
+    pipe = bundle["pipeline"]
+    preds = pipe.predict(X[bundle["columns"]])
+    if bundle.get("classes") is not None:
+        preds = np.asarray(bundle["classes"])[preds]
+    out = pd.DataFrame({"prediction": preds})
+    if proba and bundle["task"] == "classification" and hasattr(pipe, "predict_proba"):
+        labels = bundle.get("classes") or pipe.classes_
+        P = pipe.predict_proba(X[bundle["columns"]])
+        for j, label in enumerate(labels):
+            out[f"proba_{label}"] = P[:, j]
+    return out
+
+
+def _worker_chunk(X: pd.DataFrame) -> pd.DataFrame:
+    return score_chunk(_WORKER["bundle"], X, _WORKER["proba"])
+
+
+def score_file(model_path: Path, input_path: Path, output_path: Path, chunksize: int = 100_000,
+               workers: int = 1, proba: bool = False, keep: list[str] | None = None) -> int:
+    """Stream ``input_path`` through the saved model into ``output_path``; return the row count."""
+    bundle = load_model(model_path)
+    columns = bundle["columns"]
+    keep = keep or []
+    header = next(iter_chunks(input_path, 1))
+    missing = [c for c in columns + keep if c not in header.columns]
+    if missing:
+        sys.exit(f"Input is missing columns the model needs: {missing}")
+    chunks = iter_chunks(input_path, chunksize, list(dict.fromkeys(columns + keep)))
+
+    writer = PredictionWriter(output_path)
+    n_rows = 0
+    kept: list[pd.DataFrame] = []
+    pool = None
+
+    def tasks():
+        for chunk in chunks:
+            kept.append(chunk[keep].reset_index(drop=True))
+            yield (chunk[columns],)
+
+    try:
+        if workers == 1:
+            results = (score_chunk(bundle, X, proba) for (X,) in tasks())
+        else:
+            pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(str(model_path), proba))
+            results = _ordered(lambda X: pool.submit(_worker_chunk, X), tasks(), 2 * workers)
+        for preds in results:
+            ids = kept.pop(0)
+            writer.write(pd.concat([ids, preds], axis=1) if keep else preds)
+            n_rows += len(preds)
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.shutdown()
+    return n_rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Chunked batch scoring with a saved model")
+    parser.add_argument("--model", type=Path, required=True, help="Bundle written by ml_pipeline.py --save-model")
+    parser.add_argument("--input", type=Path, required=True, help="CSV, Parquet or Feather file of feature rows")
+    parser.add_argument("--output", type=Path, required=True, help="CSV or Parquet file for predictions")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Scoring processes (1 = in-process)")
+    parser.add_argument("--proba", action="store_true", help="Also write class probabilities")
+    parser.add_argument("--keep", nargs="*", default=[], help="Input columns copied to the output (e.g. an id)")
+    args = parser.parse_args()
+
+    prof = StageProfiler()
+    start = time.perf_counter()
+    with prof.stage("score"):
+        n_rows = score_file(args.model, args.input, args.output, args.chunksize, args.workers, args.proba, args.keep)
+    elapsed = time.perf_counter() - start
+    peak = prof.stages[-1]["peak_rss_mb"]
+    print(f"Scored {n_rows:,} rows in {elapsed:.1f}s ({n_rows / elapsed:,.0f} rows/s, "
+          f"{args.workers} workers, {args.chunksize:,}-row chunks)")
+    print(f"  Peak RSS (scheduler + workers): {f'{peak:.0f} MB' if peak else 'n/a'}")
+    print(f"  Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
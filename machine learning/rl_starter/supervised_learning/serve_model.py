@@ -0,0 +1,186 @@
+"""
+serve_model.py — Micro-batching HTTP prediction server for a saved ml_pipeline model.
+
+Concurrent requests are queued and merged into a single vectorised
+``predict`` / ``predict_proba`` call, bounded by a maximum batch size and
+a maximum wait, so per-row sklearn overhead is paid once per batch.
+
+Usage:
+    python ml_pipeline.py --csv data.csv --target label --save-model models/best.joblib
+    python serve_model.py --model models/best.joblib --max-batch 256 --max-wait-ms 2
+
+    curl -X POST localhost:8080/predict -d '{"rows": [{"age": 41, "city": "Oslo"}]}'
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from ml_pipeline import load_model
+
+
+class MicroBatcher:
+    """Collects rows from many callers and scores them together on one worker thread."""
+
+    def __init__(self, bundle: dict, max_batch: int = 256, max_wait_ms: float = 2.0):
+        self.pipe = bundle["pipeline"]
+        self.columns = bundle["columns"]
+        self.classes = bundle.get("classes")
+        self.with_proba = bundle["task"] == "classification" and hasattr(self.pipe, "predict_proba")
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue: queue.Queue[tuple[list[dict], Future, float]] = queue.Queue()
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.latencies: list[float] = []
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def submit(self, rows: list[dict]) -> Future:
+        fut: Future = Future()
+        self.queue.put((rows, fut, time.perf_counter()))
+        return fut
+
+    def _loop(self) -> None:
+        while True:
+            pending = [self.queue.get()]
+            n_rows = len(pending[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while n_rows < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                n_rows += len(item[0])
+            self._score(pending)
+
+    def _predict(self, rows: list[dict]) -> tuple[np.ndarray, np.ndarray | None]:
+        X = pd.DataFrame.from_records(rows, columns=self.columns)
+        preds = self.pipe.predict(X)
+        if self.classes is not None:
+            preds = np.asarray(self.classes)[preds]
+        proba = self.pipe.predict_proba(X) if self.with_proba else None
+        return preds, proba
+
+    def _score(self, pending: list[tuple[list[dict], Future, float]]) -> None:
+        rows = [row for batch, _, _ in pending for row in batch]
+        try:
+            preds, proba = self._predict(rows)
+        except Exception as exc:
+            if len(pending) == 1:
+                pending[0][1].set_exception(exc)
+                return
+            # one malformed request must not fail the others merged with it: score each on its own
+            for item in pending:
+                self._score([item])
+            return
+        start = 0
+        done = time.perf_counter()
+        with self.lock:
+            self.batches += 1
+            self.rows += len(rows)
+            self.latencies.extend(done - started for _, _, started in pending)
+            self.latencies = self.latencies[-10_000:]
+        for batch, fut, _ in pending:
+            stop = start + len(batch)
+            result = {"predictions": preds[start:stop].tolist()}
+            if proba is not None:
+                result["probabilities"] = proba[start:stop].tolist()
+            fut.set_result(result)
+            start = stop
+
+    def stats(self) -> dict[str, Any]:
+        with self.lock:
+            lat = np.asarray(self.latencies) * 1000
+            return {
+                "batches": self.batches,
+                "rows": self.rows,
+                "mean_batch_rows": self.rows / max(self.batches, 1),
+                "p50_ms": float(np.percentile(lat, 50)) if len(lat) else None,
+                "p99_ms": float(np.percentile(lat, 99)) if len(lat) else None,
+            }
+
+
+BATCHER: MicroBatcher | None = None
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default backlog of 5 resets bursts of concurrent clients
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients are not paying a TCP handshake per row
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A003
+        return
+
+    def _send(self, status: int, data: Any) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            return self._send(HTTPStatus.OK, {"ok": True, "columns": BATCHER.columns})
+        if self.path == "/stats":
+            return self._send(HTTPStatus.OK, BATCHER.stats())
+        return self._send(HTTPStatus.NOT_FOUND, {"error": "not found"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+            payload = json.loads(self.rfile.read(length).decode("utf-8")) if length > 0 else {}
+        except (ValueError, UnicodeDecodeError) as exc:  # JSONDecodeError is a ValueError
+            return self._send(HTTPStatus.BAD_REQUEST, {"error": f"invalid JSON body: {exc}"})
+        if self.path != "/predict":
+            return self._send(HTTPStatus.NOT_FOUND, {"error": "not found"})
+        if not isinstance(payload, dict):
+            return self._send(HTTPStatus.BAD_REQUEST, {"error": "expected a JSON object with 'row' or 'rows'"})
+        rows = payload.get("rows") or ([payload["row"]] if "row" in payload else [])
+        if not rows or not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return self._send(HTTPStatus.BAD_REQUEST, {"error": "expected 'row' or 'rows' of JSON objects"})
+        try:
+            return self._send(HTTPStatus.OK, BATCHER.submit(rows).result())
+        except Exception as exc:
+            return self._send(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+
+
+def main() -> None:
+    global BATCHER
+    parser = argparse.ArgumentParser(description="Micro-batching prediction server")
+    parser.add_argument("--model", type=Path, required=True, help="Bundle written by ml_pipeline.py --save-model")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch", type=int, default=256, help="Rows per vectorised predict call")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="Longest a request waits for company")
+    args = parser.parse_args()
+
+    BATCHER = MicroBatcher(load_model(args.model), args.max_batch, args.max_wait_ms)
+    server = Server((args.host, args.port), Handler)
+    print(f"Serving {args.model} at http://{args.host}:{args.port}/predict "
+          f"(max batch {args.max_batch}, max wait {args.max_wait_ms} ms)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from ml_pipeline import ColumnStats, infer_compact_dtypes, iter_csv_chunks, run_streaming  # noqa: E402
+
+N_CLASSES = 30
+
+
+def _label_sorted_csv(path: Path, n_rows: int = 3000) -> Path:
+    """String labels sorted by class, so each chunk sees only a few of them."""
+    rng = np.random.default_rng(0)
+    pd.DataFrame({
+        "a": rng.normal(size=n_rows),
+        "b": rng.normal(size=n_rows),
+        "label": np.repeat([f"class_{i:02d}" for i in range(N_CLASSES)], n_rows // N_CLASSES),
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_column_stats_keeps_every_string_label(tmp_path):
+    csv = _label_sorted_csv(tmp_path / "labels.csv")
+    stats = ColumnStats()
+    for X_chunk, y_chunk in iter_csv_chunks(str(csv), "label", 500, infer_compact_dtypes(str(csv), "label")):
+        stats.update(X_chunk, y_chunk)
+    assert stats.task == "classification"
+    assert len(stats.target_levels) == N_CLASSES
+
+
+def test_column_stats_caps_numeric_levels():
+    stats = ColumnStats(max_target_levels=20)
+    X = pd.DataFrame({"a": np.zeros(100)})
+    for start in range(0, 1000, 100):
+        stats.update(X, np.arange(start, start + 100, dtype=np.float64))
+    assert stats.task == "regression"
+    assert len(stats.target_levels) < 1000  # collection stops once past the cap
+
+
+def test_streaming_with_many_string_classes(tmp_path, monkeypatch):
+    csv = _label_sorted_csv(tmp_path / "labels.csv")
+    monkeypatch.chdir(tmp_path)  # save_comparison_chart writes under outputs/
+    args = argparse.Namespace(csv=str(csv), target="label", chunksize=500, epochs=1, save_model=None)
+    run_streaming(args)
+    assert (tmp_path / "outputs" / "labels_comparison.png").exists()
@@ -17,6 +17,7 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import sys
 import warnings
 from pathlib import Path
 
@@ -31,6 +32,11 @@ from statsmodels.tsa.statespace.sarimax import SARIMAX
 from statsmodels.tsa.stattools import adfuller
 from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.dataset_cache import DEFAULT_CACHE_DIR, cached_read_csv
+
 warnings.filterwarnings("ignore")
 
 OUTPUT_DIR = Path("outputs")
@@ -127,10 +133,14 @@ def main() -> None:
     parser.add_argument("--csv", type=str, default=None)
     parser.add_argument("--column", type=str, default=None)
     parser.add_argument("--seasonal-period", type=int, default=12)
+    parser.add_argument("--csv-cache", type=Path, default=DEFAULT_CACHE_DIR,
+                        help="Directory for the parsed-CSV columnar cache")
+    parser.add_argument("--no-csv-cache", action="store_true", help="Always re-parse the CSV")
     args = parser.parse_args()
 
     if args.csv:
-        df = pd.read_csv(args.csv, parse_dates=True, index_col=0)
+        cache_dir = None if args.no_csv_cache else args.csv_cache
+        df = cached_read_csv(args.csv, cache_dir, parse_dates=True, index_col=0)
         col = args.column or df.columns[0]
         series = df[col]
         tag = Path(args.csv).stem
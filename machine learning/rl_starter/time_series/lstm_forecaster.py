@@ -18,6 +18,7 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
 import matplotlib
@@ -29,6 +30,12 @@ import torch.nn as nn
 from torch.utils.data import DataLoader, Dataset
 from tqdm import tqdm
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.dataset_cache import DEFAULT_CACHE_DIR, cached_read_csv
+from ml_utils.metrics import RunningMetrics
+
 OUTPUT_DIR = Path("outputs")
 
 
@@ -98,7 +105,7 @@ def get_device(requested: str) -> torch.device:
 
 def train_epoch(model, loader, optimizer, criterion, device):
     model.train()
-    total_loss = 0.0
+    metrics = RunningMetrics(device)
     for x, y in loader:
         x, y = x.to(device), y.to(device)
         pred = model(x)
@@ -106,8 +113,8 @@ def train_epoch(model, loader, optimizer, criterion, device):
         optimizer.zero_grad()
         loss.backward()
         optimizer.step()
-        total_loss += loss.item() * x.size(0)
-    return total_loss / len(loader.dataset)
+        metrics.update(x.size(0), loss=loss * x.size(0))
+    return metrics.compute()["loss"]
 
 
 @torch.no_grad()
@@ -169,6 +176,9 @@ def main() -> None:
     parser.add_argument("--batch-size", type=int, default=64)
     parser.add_argument("--lr", type=float, default=1e-3)
     parser.add_argument("--device", choices=["auto", "cpu", "cuda"], default="auto")
+    parser.add_argument("--csv-cache", type=Path, default=DEFAULT_CACHE_DIR,
+                        help="Directory for the parsed-CSV columnar cache")
+    parser.add_argument("--no-csv-cache", action="store_true", help="Always re-parse the CSV")
     args = parser.parse_args()
 
     device = get_device(args.device)
@@ -176,8 +186,7 @@ def main() -> None:
 
     # load data
     if args.csv:
-        import pandas as pd
-        df = pd.read_csv(args.csv)
+        df = cached_read_csv(args.csv, None if args.no_csv_cache else args.csv_cache)
         col = args.column or df.columns[0]
         raw = df[col].values.astype(np.float32)
     else:
@@ -12,6 +12,7 @@ from __future__ import annotations
 
 import argparse
 import math
+import sys
 from pathlib import Path
 
 import matplotlib
@@ -23,6 +24,11 @@ import torch.nn as nn
 from torch.utils.data import DataLoader, Dataset
 from tqdm import tqdm
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from ml_utils.metrics import RunningMetrics
+
 OUTPUT_DIR = Path("outputs")
 
 
@@ -106,7 +112,7 @@ def get_device(requested: str) -> torch.device:
 
 def train_epoch(model, loader, optimizer, criterion, device):
     model.train()
-    total = 0.0
+    metrics = RunningMetrics(device)
     for x, y in loader:
         x, y = x.to(device), y.to(device)
         pred = model(x)
@@ -115,8 +121,8 @@ def train_epoch(model, loader, optimizer, criterion, device):
         loss.backward()
         nn.utils.clip_grad_norm_(model.parameters(), 1.0)
         optimizer.step()
-        total += loss.item() * x.size(0)
-    return total / len(loader.dataset)
+        metrics.update(x.size(0), loss=loss * x.size(0))
+    return metrics.compute()["loss"]
 
 
 @torch.no_grad()